@@ -77,14 +77,16 @@ class AyxPlugin:
         self.output_anchor.init(record_info_out)  # Lets the downstream tools know of the outgoing record metadata.
         record_creator = record_info_out.construct_record_creator()  # Creating a new record_creator for the new data.
         
-        for field in enumerate(self.output_text):
-                record_info_out[field[0]].set_from_string(record_creator, field[1])
-        
-    
-        out_record = record_creator.finalize_record()
-        self.output_anchor.push_record(out_record, False)  # False: completed connections will automatically close.
+        # A limit of 0 (e.g. a preview of the layout) only needs the metadata.
+        if n_record_limit != 0:
+            for field in enumerate(self.output_text):
+                    record_info_out[field[0]].set_from_string(record_creator, field[1])
+
+
+            out_record = record_creator.finalize_record()
+            self.output_anchor.push_record(out_record, False)  # False: completed connections will automatically close.
 
-        self.alteryx_engine.output_message(self.n_tool_id, Sdk.EngineMessageType.info, self.xmsg("One Record"))
+            self.alteryx_engine.output_message(self.n_tool_id, Sdk.EngineMessageType.info, self.xmsg("One Record"))
         self.output_anchor.close()  # Close outgoing connections.
         return True
 
@@ -8,6 +8,9 @@ import xml.etree.ElementTree as Et
 import csv
 import os
 
+# Maximum number of columns the tool will generate.
+MAX_COLUMNS = 100000
+
 
 class AyxPlugin:
     """
@@ -33,6 +36,7 @@ class AyxPlugin:
         self.output_anchor = None
         self.output_text = ['InfoLab']
         self.n_columns = None
+        self.values = None
 
 
     def pi_init(self, str_xml: str):
@@ -44,7 +48,15 @@ class AyxPlugin:
 
         self.output_anchor = self.output_anchor_mgr.get_output_anchor('Output')
         # Getting the user-entered selections from the GUI.
-        self.n_columns = int(Et.fromstring(str_xml).find('NColumns').text) if 'NColumns' in str_xml else None
+        self.n_columns = int(Et.fromstring(str_xml).find('NColumns').text) if 'NColumns' in str_xml else 1
+
+        # Limit the number of columns to MAX_COLUMNS
+        if self.n_columns > MAX_COLUMNS:
+            self.n_columns = MAX_COLUMNS
+            self.alteryx_engine.output_message(self.n_tool_id, Sdk.EngineMessageType.warning, self.xmsg('Maximum number of columns reached, capped at '+str(MAX_COLUMNS)))
+
+        # The value of every column, formatted once here rather than while pushing.
+        self.values = self.output_text*self.n_columns
 
         pass
 
@@ -80,15 +92,17 @@ class AyxPlugin:
         record_info_out = self.build_record_info_out()  # Building out the outgoing record layout.
         self.output_anchor.init(record_info_out)  # Lets the downstream tools know of the outgoing record metadata.
         record_creator = record_info_out.construct_record_creator()  # Creating a new record_creator for the new data.
-        
-        for field in enumerate(self.output_text*self.n_columns):
-                record_info_out[field[0]].set_from_string(record_creator, field[1])
-        
-    
-        out_record = record_creator.finalize_record()
-        self.output_anchor.push_record(out_record, False)  # False: completed connections will automatically close.
-
-        self.alteryx_engine.output_message(self.n_tool_id, Sdk.EngineMessageType.info, self.xmsg("One Record"))
+        fields = [record_info_out[i] for i in range(self.n_columns)]  # Looked up once, not once per cell.
+
+        # A limit of 0 (e.g. a preview of the layout) only needs the metadata.
+        if n_record_limit != 0:
+            for field, value in zip(fields, self.values):
+                field.set_from_string(record_creator, value)
+
+            out_record = record_creator.finalize_record()
+            self.output_anchor.push_record(out_record, False)  # False: completed connections will automatically close.
+
+            self.alteryx_engine.output_message(self.n_tool_id, Sdk.EngineMessageType.info, self.xmsg("One Record"))
         self.output_anchor.close()  # Close outgoing connections.
         return True
 
@@ -109,9 +123,9 @@ class AyxPlugin:
         """
 
         record_info_out = Sdk.RecordInfo(self.alteryx_engine)  # A fresh record info object for outgoing records.
-        #We are returning a single column and a single row. 
-        for i in range(self.n_columns):
-            record_info_out.add_field('NewText_'+str(i), Sdk.FieldType.string, 254)
+        #We are returning N columns and a single row, each field as wide as its text.
+        for i, value in enumerate(self.values):
+            record_info_out.add_field('NewText_'+str(i), Sdk.FieldType.string, max(len(value), 1))
         return record_info_out
 
     def display_error_msg(self, msg_string: str):
@@ -0,0 +1,50 @@
+"""
+Compares the rows/sec of the cell text building in 1c_PythonExampleEngine.py against the original push loop.
+Only the Python side is timed, the SDK calls setting the fields are the same in both and need Designer to run.
+Needs the Python shipped with Alteryx (AlteryxPythonSDK has to be importable), run it from this folder:
+    python 1c_PythonExampleBenchmark.py
+"""
+
+import importlib
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+text_rows = importlib.import_module('1c_PythonExampleEngine').text_rows
+
+# (rows, columns) sizes to time.
+SIZES = [(100000, 1), (100000, 5), (100000, 20), (1000000, 5)]
+TEXT = 'infolab'
+
+
+def legacy_text_rows(text, n_columns, n_rows):
+    "The cell values of the original push loop, kept as the baseline"
+    output_text = [text]
+    for record in range(n_rows):
+        values = []
+        for field in enumerate(output_text*n_columns):
+            values.append(field[1] + '_r'+str(record)+'c'+str(field[0]))
+        yield values
+
+
+def rows_per_second(rows, n_columns, n_rows):
+    "Consumes a row generator and returns the rows it produced per second"
+    start = time.perf_counter()
+    for values in rows(TEXT, n_columns, n_rows):
+        pass
+    return n_rows / (time.perf_counter() - start)
+
+
+def main():
+    print('{:>9} {:>8} {:>14} {:>14} {:>9}'.format('rows', 'columns', 'legacy rows/s', 'new rows/s', 'speedup'))
+    for n_rows, n_columns in SIZES:
+        assert list(legacy_text_rows(TEXT, n_columns, 100)) == list(text_rows(TEXT, n_columns, 100))
+        legacy_rate = rows_per_second(legacy_text_rows, n_columns, n_rows)
+        new_rate = rows_per_second(text_rows, n_columns, n_rows)
+        print('{:>9} {:>8} {:>14.0f} {:>14.0f} {:>8.1f}x'.format(n_rows, n_columns, legacy_rate, new_rate,
+                                                                 new_rate / legacy_rate))
+
+
+if __name__ == '__main__':
+    main()
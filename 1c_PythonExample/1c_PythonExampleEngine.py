@@ -7,6 +7,112 @@ import AlteryxPythonSDK as Sdk
 import xml.etree.ElementTree as Et
 import csv
 import os
+import re
+import numpy as np
+
+# Maximum number of rows the tool will generate.
+MAX_ROWS = 100000000
+
+# Number of records between progress updates.
+PROGRESS_INTERVAL = 65536
+
+
+def text_rows(text, n_columns, n_rows):
+    """
+    Yields the cell values of each row, text + '_r<row>c<column>'. The per-column suffixes are built once and the
+    per-row prefix once per row, so each cell costs a single concatenation.
+    :param text: The free text filling the cells.
+    :param n_columns: Number of columns.
+    :param n_rows: Number of rows.
+    """
+
+    prefix = text + '_r'
+    suffixes = ['c' + str(column) for column in range(n_columns)]
+    for record in range(n_rows):
+        head = prefix + str(record)
+        yield [head + suffix for suffix in suffixes]
+
+
+# Largest seed of the generator mode, RandomState seeds are 32-bit.
+MAX_SEED = 2**32 - 1
+
+# Rows per chunk of generated values in generator mode.
+CHUNK_ROWS = 65536
+
+# Distributions of the generator mode: name -> (field type, sampler(rng, size, *args)), rng a numpy RandomState (the
+# Generator API needs numpy 1.17).
+DISTRIBUTIONS = {
+    'int': ('int64', lambda rng, size, low, high: rng.randint(int(low), int(high)+1, size, dtype=np.int64)),
+    'poisson': ('int64', lambda rng, size, lam: rng.poisson(float(lam), size)),
+    'normal': ('double', lambda rng, size, mean, sd: rng.normal(float(mean), float(sd), size)),
+    'uniform': ('double', lambda rng, size, low, high: rng.uniform(float(low), float(high), size)),
+}
+
+
+def parse_columns(spec):
+    """
+    Parses the generator mode columns, separated by semicolons: int(low, high), poisson(lambda), normal(mean, sd),
+    uniform(low, high), date(first, last) with ISO dates, or category(label, label:weight, ...).
+    :param spec: The column specification from the GUI.
+    :return: A list of (name, field type, size, sampler) tuples, sampler(rng, size) returning a list of values.
+    :raises ValueError: If a column can't be parsed.
+    """
+
+    columns = []
+    for i, column in enumerate(part.strip() for part in spec.split(';') if part.strip()):
+        match = re.fullmatch(r'(\w+)\s*\((.*)\)', column)
+        if match is None:
+            raise ValueError('Invalid column "' + column + '"')
+        kind, args = match.group(1).lower(), [arg.strip() for arg in match.group(2).split(',')]
+        name = kind + '_' + str(i)
+        if kind in DISTRIBUTIONS:
+            field_type, draw = DISTRIBUTIONS[kind]
+            try:
+                draw(np.random.RandomState(0), 1, *args)
+            except (TypeError, ValueError):
+                raise ValueError('Invalid arguments in "' + column + '"')
+            columns.append((name, field_type, 0,
+                            lambda rng, size, draw=draw, args=args: draw(rng, size, *args).tolist()))
+        elif kind == 'date':
+            try:
+                first, last = (np.datetime64(arg, 'D') for arg in args)
+            except (TypeError, ValueError):
+                raise ValueError('Invalid dates in "' + column + '"')
+            if first > last:
+                raise ValueError('First date after the last one in "' + column + '"')
+            span = int((last - first) / np.timedelta64(1, 'D'))
+            columns.append((name, 'date', 0, lambda rng, size, first=first, span=span:
+                            (first + rng.randint(0, span+1, size)).astype(str).tolist()))
+        elif kind == 'category':
+            labels = [arg.rsplit(':', 1)[0] for arg in args]
+            try:
+                weights = np.array([float(arg.rsplit(':', 1)[1]) if ':' in arg else 1.0 for arg in args])
+            except ValueError:
+                raise ValueError('Invalid weights in "' + column + '"')
+            if not np.isfinite(weights).all() or weights.min() < 0 or not weights.sum():
+                raise ValueError('Invalid weights in "' + column + '"')
+            columns.append((name, 'v_string', max(len(label) for label in labels) or 1,
+                            lambda rng, size, labels=np.array(labels, dtype=object), p=weights/weights.sum():
+                            labels[rng.choice(len(labels), size, p=p)].tolist()))
+        else:
+            raise ValueError('Unknown column type "' + kind + '"')
+    return columns
+
+
+def generated_chunks(columns, n_rows, seed):
+    """
+    Yields the generated values CHUNK_ROWS rows at a time, as one list per column. Every column draws from its own
+    stream, seeded with the seed and the column's position, so a column's values don't change when columns are added
+    or removed after it.
+    :param columns: The columns returned by parse_columns().
+    :param n_rows: Number of rows.
+    :param seed: Seed of the random generators, from 0 to MAX_SEED.
+    """
+
+    rngs = [np.random.RandomState([seed, i]) for i in range(len(columns))]
+    for start in range(0, n_rows, CHUNK_ROWS):
+        size = min(CHUNK_ROWS, n_rows - start)
+        yield [sample(rng, size) for (name, field_type, field_size, sample), rng in zip(columns, rngs)]
 
 
 class AyxPlugin:
@@ -34,6 +140,9 @@ class AyxPlugin:
         self.output_text = None
         self.n_columns = None
         self.n_rows = None
+        self.mode = None
+        self.columns = None
+        self.seed = None
 
 
     def pi_init(self, str_xml: str):
@@ -60,10 +169,30 @@ class AyxPlugin:
             self.n_rows = 1
             self.display_error_msg('Invalid number of rows! Defaulting to a single row.','warning')
 
-        # Limit the number of rows to 10000
-        if self.n_rows > 10000:
-            self.n_rows = 10000
-            self.display_error_msg('Maximum number of rows reached, capped at 10000','warning')
+        # Text mode repeats FText, generator mode fills typed columns with seeded random values.
+        self.mode = Et.fromstring(str_xml).find('Mode').text if 'Mode' in str_xml else 'text'
+        if self.mode == 'generator':
+            try:
+                self.columns = parse_columns(Et.fromstring(str_xml).findtext('Columns') or '')  # Not 'Columns' in str_xml, NColumns matches it.
+                if not self.columns:
+                    raise ValueError('No columns defined')
+            except ValueError as error:
+                self.columns = None
+                self.display_error_msg('Invalid generator columns: '+str(error)+'.','error')
+            temp_seed = Et.fromstring(str_xml).find('Seed').text if 'Seed' in str_xml else None
+            try:
+                self.seed = int(temp_seed) if temp_seed else 0
+            except ValueError:
+                self.seed = 0
+                self.display_error_msg('Seed is not an integer! Using seed 0.','warning')
+            if not 0 <= self.seed <= MAX_SEED:
+                self.seed = 0
+                self.display_error_msg('Seed has to be between 0 and '+str(MAX_SEED)+'! Using seed 0.','warning')
+
+        # Limit the number of rows to MAX_ROWS
+        if self.n_rows > MAX_ROWS:
+            self.n_rows = MAX_ROWS
+            self.display_error_msg('Maximum number of rows reached, capped at '+str(MAX_ROWS),'warning')
             
             
         pass
@@ -97,21 +226,66 @@ class AyxPlugin:
         :return: False if there are issues with the input data or if the workflow isn't being ran, otherwise True.
         """
 
+        # Only the rows the record limit asks for are built, none for a limit of 0 (<0 means no limit).
+        n_rows = self.n_rows if n_record_limit < 0 else min(self.n_rows, n_record_limit)
+        if self.mode == 'generator':
+            return self.push_generated(n_rows)
+
         record_info_out = self.build_record_info_out()  # Building out the outgoing record layout.
         self.output_anchor.init(record_info_out)  # Lets the downstream tools know of the outgoing record metadata.
         record_creator = record_info_out.construct_record_creator()  # Creating a new record_creator for the new data.
-        
-        for record in range(self.n_rows):
-            for field in enumerate(self.output_text*self.n_columns):
-                    record_info_out[field[0]].set_from_string(record_creator, field[1] + '_r'+str(record)+'c'+str(field[0]))
+        fields = [record_info_out[i] for i in range(self.n_columns)]  # Looked up once, not once per cell.
+        push_record = self.output_anchor.push_record
 
+        for record, values in enumerate(text_rows(self.output_text[0], self.n_columns, n_rows)):
+            for field, value in zip(fields, values):
+                field.set_from_string(record_creator, value)
 
             out_record = record_creator.finalize_record()
-            self.output_anchor.push_record(out_record, False)  # False: completed connections will automatically close.
+            push_record(out_record, False)  # False: completed connections will automatically close.
             record_creator.reset()  # Resets the variable length data to 0 bytes (default) to prevent unexpected results.
+            if record % PROGRESS_INTERVAL == 0:
+                self.alteryx_engine.output_tool_progress(self.n_tool_id, record / n_rows)
+
+        self.alteryx_engine.output_message(self.n_tool_id, Sdk.EngineMessageType.info, self.xmsg(
+        str(n_rows)+' records were processed, and '+str(self.n_columns)+ ' fields were created.'))
+        self.output_anchor.close()  # Close outgoing connections.
+        return True
+
+    def push_generated(self, n_rows: int) -> bool:
+        """
+        A non-interface helper for pi_push_all_records() that pushes the generator mode rows, drawing the values of
+        each column CHUNK_ROWS rows at a time and setting them through the field's own type.
+        :param n_rows: Number of rows to push.
+        :return: False if the columns are invalid, otherwise True.
+        """
+
+        if self.columns is None:
+            self.output_anchor.close()  # Nothing to push, but the connections still have to close for pi_close().
+            return False
+        record_info_out = self.build_record_info_out()  # Building out the outgoing record layout.
+        self.output_anchor.init(record_info_out)  # Lets the downstream tools know of the outgoing record metadata.
+        record_creator = record_info_out.construct_record_creator()  # Creating a new record_creator for the new data.
+        setters = []
+        for i, (name, field_type, size, sample) in enumerate(self.columns):
+            field = record_info_out[i]
+            setters.append(field.set_from_int64 if field_type == 'int64' else
+                           field.set_from_double if field_type == 'double' else field.set_from_string)
+        push_record = self.output_anchor.push_record
+
+        n_records = 0
+        for chunk in generated_chunks(self.columns, n_rows, self.seed):
+            for values in zip(*chunk):
+                for setter, value in zip(setters, values):
+                    setter(record_creator, value)
+                out_record = record_creator.finalize_record()
+                push_record(out_record, False)  # False: completed connections will automatically close.
+                record_creator.reset()  # Resets the variable length data to 0 bytes (default) to prevent unexpected results.
+            n_records += len(chunk[0])
+            self.alteryx_engine.output_tool_progress(self.n_tool_id, n_records / n_rows)
 
         self.alteryx_engine.output_message(self.n_tool_id, Sdk.EngineMessageType.info, self.xmsg(
-        str(self.n_rows)+' records were processed, and '+str(self.n_columns)+ ' fields were created.'))
+        str(n_records)+' records were generated, and '+str(len(self.columns))+ ' fields were created.'))
         self.output_anchor.close()  # Close outgoing connections.
         return True
 
@@ -132,6 +306,10 @@ class AyxPlugin:
         """
 
         record_info_out = Sdk.RecordInfo(self.alteryx_engine)  # A fresh record info object for outgoing records.
+        if self.mode == 'generator':
+            for name, field_type, size, sample in self.columns:
+                record_info_out.add_field(name, getattr(Sdk.FieldType, field_type), size)
+            return record_info_out
         #We are returning a single column and a single row. 
         for i in range(self.n_columns):
             record_info_out.add_field('NewText_'+str(i), Sdk.FieldType.string, 254)
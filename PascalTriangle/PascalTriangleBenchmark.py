@@ -0,0 +1,158 @@
+"""
+Compares the exact row recurrence in PascalTriangleEngine.py against the original scipy.special.binom implementation.
+Needs the Python shipped with Alteryx (AlteryxPythonSDK has to be importable) and scipy, run it from this folder:
+    python PascalTriangleBenchmark.py
+"""
+
+import os
+import sys
+import tempfile
+import time
+
+import pandas as pd
+import scipy.special
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+import PascalTriangleEngine
+from PascalTriangleEngine import AyxPlugin
+
+# Numbers of rows to time, the legacy implementation is skipped above LEGACY_MAX_ROWS.
+ROW_COUNTS = [10, 25, 50, 100, 500, 2000]
+LEGACY_MAX_ROWS = 100
+
+# The engine's in-process row cache size, before main() turns the cache off to time the computation.
+ROW_CACHE_BYTES = PascalTriangleEngine.ROW_CACHE_BYTES
+
+# Rows of the mod 2 triangle run through the on-disk store.
+MODULAR_STORE_ROWS = 20000
+
+# Slice of exact rows timed across process counts, deep enough for the conversion to text to dominate.
+SCALING_ROWS = (6000, 6063)
+
+
+def legacy_pascal(value):
+    "The original implementation of AyxPlugin.Pascal, kept as the baseline (object dtype for newer pandas)"
+    df = pd.DataFrame(0, index= range(value+1), columns = range((value+1)*2-1), dtype=object)
+    for index in df.index:
+        diff = len(df) - (index+1) #calculate the step to add to the stair
+        for column in df.columns:
+            try:
+                df.iloc[index,(column*2 + diff)] = int(scipy.special.binom(index, column))
+            except: pass
+    df.replace(to_replace=0,value='',inplace=True)# remove zeros
+    return df
+
+
+def streamed_pascal(plugin, value):
+    "Collects the rows streamed by the engine's Pascal generator into a DataFrame"
+    return pd.DataFrame(list(plugin.Pascal(value)))
+
+
+def exact_mismatches(df, value):
+    """
+    Counts the cells of a staircase triangle that differ from the textbook row recurrence (no math.comb before 3.8),
+    by their digits as the engine hands the coefficients past int64 out as text.
+    """
+    cells = df.values
+    wrong = 0
+    reference = [1]
+    for n in range(value+1):
+        wrong += sum(str(cells[n, value-n+2*k]) != str(coefficient) for k, coefficient in enumerate(reference))
+        reference = [a + b for a, b in zip([0] + reference, reference + [0])]
+    return wrong
+
+
+def rows_digest(rows):
+    "Hashes streamed rows one at a time, so comparing runs doesn't hold them all in memory"
+    digest = 0
+    for index, row in enumerate(rows):
+        digest ^= hash((index, tuple(row)))
+    return digest
+
+
+def clear_row_cache(size):
+    "Empties the engine's in-process row cache and sets its size"
+    PascalTriangleEngine.ROW_CACHE.clear()
+    PascalTriangleEngine.ROW_CACHE_DEPTHS.clear()
+    PascalTriangleEngine.ROW_CACHE_FILL = 0
+    PascalTriangleEngine.ROW_CACHE_BYTES = size
+
+
+def check_cache_reruns():
+    "Runs MAX_ROWS rows twice with the in-process row cache on, the rerun has to be faster"
+    clear_row_cache(ROW_CACHE_BYTES)
+    plugin = AyxPlugin(0, None, None)
+    first_run, first_time = timed(rows_digest, plugin.triangle_rows(0, PascalTriangleEngine.MAX_ROWS))
+    rerun, rerun_time = timed(rows_digest, plugin.triangle_rows(0, PascalTriangleEngine.MAX_ROWS))
+    assert rerun == first_run
+    assert rerun_time < first_time
+    print('{} rows: first run {:.4f} s, rerun {:.4f} s with {} rows from the cache'.format(
+        PascalTriangleEngine.MAX_ROWS, first_time, rerun_time, plugin.cached_rows))
+
+
+def check_store_reruns(modulus, rows):
+    """
+    Runs rows rows without a cache folder, then twice with one and the in-process row cache off, the rerun is served
+    from the on-disk store and has to beat the computation.
+    """
+    clear_row_cache(0)
+    plugin = AyxPlugin(0, None, None)
+    plugin.modulus = modulus
+    computed, computed_time = timed(rows_digest, plugin.triangle_rows(0, rows))
+    with tempfile.TemporaryDirectory() as cache_directory:
+        plugin.cache_directory = cache_directory
+        first_run, first_time = timed(rows_digest, plugin.triangle_rows(0, rows))
+        rerun, rerun_time = timed(rows_digest, plugin.triangle_rows(0, rows))
+    assert rerun == first_run == computed
+    assert plugin.cached_rows == rows+1
+    assert rerun_time < computed_time
+    print('{} rows mod {}: computed {:.4f} s, first run with the store {:.4f} s, rerun from the store {:.4f} s'.format(
+        rows, modulus or '- (exact)', computed_time, first_time, rerun_time))
+
+
+def check_process_scaling():
+    "Times SCALING_ROWS with one process and with pools of 2, 4, ... up to one process per core, outputs have to match"
+    clear_row_cache(0)
+    plugin = AyxPlugin(0, None, None)
+    counts = sorted({1, 2, os.cpu_count() or 1} | {2**i for i in range(1, (os.cpu_count() or 1).bit_length())})
+    single = None
+    for processes in counts:
+        plugin.processes = processes
+        digest, seconds = timed(rows_digest, plugin.triangle_rows(*SCALING_ROWS))
+        single = single or (digest, seconds)
+        assert digest == single[0]
+        print('rows {}-{} with {:>3} processes: {:.4f} s, {:.2f}x'.format(
+            SCALING_ROWS[0], SCALING_ROWS[1], processes, seconds, single[1] / seconds))
+    plugin.processes = 1
+
+
+def timed(function, *args):
+    "Returns the result of function(*args) and the seconds it took"
+    start = time.perf_counter()
+    result = function(*args)
+    return result, time.perf_counter() - start
+
+
+def main():
+    check_cache_reruns()
+    check_store_reruns(0, PascalTriangleEngine.MAX_ROWS)
+    check_store_reruns(2, MODULAR_STORE_ROWS)
+    check_process_scaling()
+    clear_row_cache(0)  # Times the computation, not the in-process row cache.
+    plugin = AyxPlugin(0, None, None)
+    print('{:>6} {:>12} {:>12} {:>9} {:>16} {:>16}'.format('rows', 'legacy (s)', 'exact (s)', 'speedup',
+                                                          'legacy wrong', 'exact wrong'))
+    for value in ROW_COUNTS:
+        df, new_time = timed(streamed_pascal, plugin, value)
+        if value > LEGACY_MAX_ROWS:
+            print('{:>6} {:>12} {:>12.4f} {:>9} {:>16} {:>16}'.format(value, '-', new_time, '-', '-',
+                                                                     exact_mismatches(df, value)))
+            continue
+        legacy_df, legacy_time = timed(legacy_pascal, value)
+        print('{:>6} {:>12.4f} {:>12.4f} {:>8.0f}x {:>16} {:>16}'.format(
+            value, legacy_time, new_time, legacy_time / new_time, exact_mismatches(legacy_df, value),
+            exact_mismatches(df, value)))
+
+
+if __name__ == '__main__':
+    main()
@@ -5,8 +5,361 @@ Although defining IncomingInterface is optional, the interface methods are neede
 
 import AlteryxPythonSDK as Sdk
 import xml.etree.ElementTree as Et
-import scipy.special
-import pandas as pd
+import decimal
+import math
+import heapq
+import os
+import sys
+from collections import deque
+import numpy as np
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+# Maximum number of rows the tool will generate, with exact and with modular coefficients.
+MAX_ROWS = 2000
+MAX_MODULAR_ROWS = 200000
+
+# Prime moduli up to LUCAS_MAX_PRIME use Lucas' theorem, their factorial tables have to fit in memory and their
+# products in int64. Moduli have to stay under MAX_MODULUS so the sum of two residues fits in int64.
+LUCAS_MAX_PRIME = 1000000
+MAX_MODULUS = 2**62
+
+# Number of rows appended to the on-disk store at a time.
+ROW_CHUNK = 256
+
+# Estimated bytes of decimal text each task of the process pool converts, see text_tasks().
+TEXT_CHUNK_BYTES = 16 * 2**20
+
+# Last row computed by a worker process of the pool, as (index, row).
+WORKER_ROW = (None, None)
+
+# In-process cache of the rows as triangle_rows() yields them per (modulus, row index), modulus 0 for the exact rows.
+# Holds up to ROW_CACHE_BYTES of rows, ROW_CACHE_FILL is the number of bytes currently held and ROW_CACHE_DEPTHS a heap
+# of the cached keys, shallowest row first.
+ROW_CACHE = {}
+ROW_CACHE_BYTES = 256 * 2**20
+ROW_CACHE_FILL = 0
+ROW_CACHE_DEPTHS = []
+
+# Number of cells row_bytes() weighs to estimate the size of a row.
+ROW_SAMPLE_CELLS = 32
+
+# Coefficients up to INT64_MAX go out as int64, up to FIXED_DECIMAL_DIGITS digits as fixed decimals, text past that.
+INT64_MAX = 2**63 - 1
+FIXED_DECIMAL_DIGITS = 50
+
+
+def decimal_text(value):
+    "str() for the text fields, Python ints through Decimal as newer Pythons refuse str() past 4300 digits"
+    return str(decimal.Decimal(value)) if type(value) is int else str(value)
+
+
+def text_cells(coefficients):
+    "Coefficients up to INT64_MAX as they are, the larger ones as their decimal digits"
+    return [coefficient if coefficient <= INT64_MAX else decimal_text(coefficient) for coefficient in coefficients]
+
+
+def text_row(row):
+    """
+    Prepares an exact row for the output fields: coefficients up to INT64_MAX stay ints, the larger ones become their
+    decimal digits. Converting big ints to text costs far more than computing them, so only the first half of the
+    row is converted and the mirrored half shares its strings.
+    :param row: The row, as a list of ints.
+    :return: The row, as a list of ints and strings.
+    """
+
+    half = text_cells(row[:(len(row)+1)//2])
+    return half + half[:len(row)-len(half)][::-1]
+
+
+def text_cell(cell):
+    "Reads back a coefficient of text_row() from its digits: an int up to INT64_MAX, the digits themselves past it"
+    if len(cell) > len(str(INT64_MAX)):
+        return cell
+    value = int(cell)
+    return value if value <= INT64_MAX else cell
+
+
+def next_pascal_row(row):
+    """
+    Builds the next row of the triangle from the previous one with the exact additive recurrence.
+    Rows are symmetric, so only the first half is computed and then mirrored.
+    :param row: Row n of the triangle, as a list of ints.
+    :return: Row n+1 of the triangle.
+    """
+
+    half = [1] + [row[k-1] + row[k] for k in range(1, (len(row)+2)//2)]
+    return half + half[:len(row)+1-len(half)][::-1]
+
+
+def pascal_row(n):
+    """
+    Computes row n of the triangle on its own with the exact multiplicative formula C(n,k) = C(n,k-1)*(n-k+1)/k.
+    Only the first half is computed and then mirrored.
+    :param n: Index of the row.
+    :return: Row n of the triangle, as a list of ints.
+    """
+
+    half = [1]
+    for k in range(1, n//2+1):
+        half.append(half[-1] * (n-k+1) // k)
+    return half + half[:n+1-len(half)][::-1]
+
+
+def lucas_row(n, p):
+    """
+    Computes row n of the triangle mod the prime p with Lucas' theorem: C(n,k) is the product of the C(n_i,k_i) of
+    the base p digits of n and k, each one read from factorial tables mod p.
+    :param n: Index of the row.
+    :param p: A prime up to LUCAS_MAX_PRIME.
+    :return: Row n of the triangle mod p, as an int64 array.
+    """
+
+    factorial = np.ones(p, dtype=np.int64)
+    for a in range(1, p):
+        factorial[a] = factorial[a-1] * a % p
+    inverse = np.ones(p, dtype=np.int64)
+    inverse[p-1] = pow(int(factorial[p-1]), p-2, p)
+    for a in range(p-1, 0, -1):
+        inverse[a-1] = inverse[a] * a % p
+
+    k = np.arange(n+1, dtype=np.int64)
+    row = np.ones(n+1, dtype=np.int64)
+    while n:
+        n_digit, k_digit = n % p, k % p
+        digit_binomial = factorial[n_digit] * inverse[k_digit] % p * inverse[np.maximum(n_digit-k_digit, 0)] % p
+        row = row * np.where(k_digit <= n_digit, digit_binomial, 0) % p
+        n //= p
+        k //= p
+    return row
+
+
+def is_prime(n):
+    "Trial division, only used on moduli up to LUCAS_MAX_PRIME where n**0.5 is exact enough (no math.isqrt before 3.8)"
+    return n > 1 and all(n % d for d in range(2, int(n**0.5)+1))
+
+
+def pascal_rows_mod(first, last, modulus):
+    """
+    Yields the rows first to last of the triangle mod modulus in order, one int64 array at a time.
+    The first row comes from Lucas' theorem for primes up to LUCAS_MAX_PRIME and from the exact row otherwise,
+    the rest from the additive recurrence on small-integer arrays.
+    :param first: Index of the first row.
+    :param last: Index of the last row.
+    :param modulus: The modulus, from 2 to MAX_MODULUS.
+    """
+
+    if modulus <= LUCAS_MAX_PRIME and is_prime(modulus):
+        row = lucas_row(first, modulus)
+    else:
+        row = np.array([coefficient % modulus for coefficient in pascal_row(first)], dtype=np.int64)
+    for index in range(first, last+1):
+        yield row
+        if index < last:
+            next_row = np.ones(len(row)+1, dtype=np.int64)
+            np.add(row[:-1], row[1:], out=next_row[1:-1])
+            next_row[1:-1] %= modulus
+            row = next_row
+
+
+def text_tasks(indices):
+    """
+    Splits the first halves of the given rows in tasks for text_pieces(), each one a list of (n, start, stop) pieces
+    covering about TEXT_CHUNK_BYTES of decimal text: small rows are grouped, the rows past TEXT_CHUNK_BYTES are split.
+    The text of a coefficient of row n is bounded by the digits of 2^n.
+    :param indices: Indices of the rows, in increasing order.
+    """
+
+    task, task_bytes = [], 0
+    for n in indices:
+        digits = int(n * math.log10(2)) + 2  # Plus the separator, or the pointer of a small int.
+        start, half = 0, n//2 + 1
+        while start < half:
+            stop = min(start + max((TEXT_CHUNK_BYTES - task_bytes) // digits, 1), half)
+            task.append((n, start, stop))
+            task_bytes += (stop-start) * digits
+            start = stop
+            if task_bytes + digits > TEXT_CHUNK_BYTES:
+                yield task
+                task, task_bytes = [], 0
+    if task:
+        yield task
+
+
+def text_pieces(pieces):
+    """
+    Converts pieces of rows like text_row() does, computing the rows on the way. Module level so it can be sent to the
+    worker processes, each keeping its last row in WORKER_ROW so the next piece of a row, or the next row, doesn't
+    start from pascal_row() again.
+    :param pieces: (n, start, stop) tuples, the coefficients start to stop-1 of row n.
+    :return: The converted pieces, as lists of ints and strings.
+    """
+
+    global WORKER_ROW
+    converted = []
+    for n, start, stop in pieces:
+        index, row = WORKER_ROW
+        if index != n:
+            row = next_pascal_row(row) if index == n-1 else pascal_row(n)
+            WORKER_ROW = (n, row)
+        converted.append(text_cells(row[start:stop]))
+    return converted
+
+
+def pascal_text_rows(indices, processes=1):
+    """
+    Yields the given rows of the triangle in order, converted by text_row(). A run of consecutive rows starts from its
+    first row with pascal_row() and carries on with next_pascal_row().
+    Converting the coefficients to text outweighs computing them by far, so with processes other than 1 (0 for one
+    process per core) the conversion is spread across a process pool: text_tasks() splits the rows in tasks of about
+    TEXT_CHUNK_BYTES, two tasks per process are kept in flight and the pieces are joined and mirrored here, so memory
+    stays bounded by the tasks in flight and the row being joined. If the pool breaks the remaining rows are converted
+    here.
+    :param indices: Indices of the rows, in increasing order.
+    :param processes: Number of worker processes.
+    """
+
+    done = 0
+    if processes != 1 and indices:
+        try:
+            with ProcessPoolExecutor(processes or None) as pool:
+                tasks = text_tasks(indices)
+                in_flight = deque()
+                half = []
+                while True:
+                    while len(in_flight) < 2*(processes or os.cpu_count() or 1):
+                        task = next(tasks, None)
+                        if task is None:
+                            break
+                        in_flight.append((task, pool.submit(text_pieces, task)))
+                    if not in_flight:
+                        break
+                    task, future = in_flight.popleft()
+                    for (n, start, stop), piece in zip(task, future.result()):
+                        half += piece
+                        if stop == n//2 + 1:
+                            yield half + half[:n+1-len(half)][::-1]
+                            half = []
+                            done += 1
+            return
+        except (OSError, BrokenProcessPool):
+            pass
+
+    index = row = None
+    for n in indices[done:]:
+        row = next_pascal_row(row) if index == n-1 else pascal_row(n)
+        index = n
+        yield text_row(row)
+
+
+def row_bytes(row):
+    """
+    Estimates the memory held by a cached row. Modular rows are arrays and hold their buffer, exact rows hold their
+    list and the objects of their first half, shared with the mirrored half, weighed from ROW_SAMPLE_CELLS of them.
+    """
+
+    if isinstance(row, np.ndarray):
+        return row.nbytes
+    half = row[:(len(row)+1)//2]
+    sample = half[::max(len(half)//ROW_SAMPLE_CELLS, 1)]
+    return sys.getsizeof(row) + sum(map(sys.getsizeof, sample)) * len(half) // len(sample)
+
+
+def cache_row(modulus, index, row):
+    """
+    Keeps a row in the in-process cache. Past ROW_CACHE_BYTES the shallowest rows are evicted first, and a row
+    shallower than every cached one is not kept: the cost of a row grows faster than its size (converting an exact
+    coefficient to text is quadratic in its digits), so the deep rows save the most per byte. triangle_rows() computes
+    the rows missing around them.
+    """
+
+    global ROW_CACHE_FILL
+    if (modulus, index) in ROW_CACHE:
+        return
+    size = row_bytes(row)
+    while ROW_CACHE_FILL + size > ROW_CACHE_BYTES:
+        if not ROW_CACHE_DEPTHS or ROW_CACHE_DEPTHS[0][0] >= index:
+            return
+        shallowest, shallowest_modulus = heapq.heappop(ROW_CACHE_DEPTHS)
+        ROW_CACHE_FILL -= row_bytes(ROW_CACHE.pop((shallowest_modulus, shallowest)))
+    ROW_CACHE[(modulus, index)] = row
+    heapq.heappush(ROW_CACHE_DEPTHS, (index, modulus))
+    ROW_CACHE_FILL += size
+
+
+def cached_row(modulus, index):
+    "Returns a row from the in-process cache, None if it is not there"
+    return ROW_CACHE.get((modulus, index))
+
+
+def row_store_paths(directory, modulus):
+    "Returns the data and offset files of the on-disk row store of a modulus, 0 for the exact rows"
+    name = os.path.join(directory, 'pascal_rows_mod' + str(modulus) if modulus else 'pascal_rows_text')
+    return name + '.bin', name + '.idx'
+
+
+def store_dtype(modulus):
+    "Returns the narrowest little-endian unsigned dtype holding the residues of a modulus"
+    return next(dtype for dtype in ('<u1', '<u2', '<u4', '<u8') if modulus-1 <= np.iinfo(dtype).max)
+
+
+def open_row_store(directory, modulus):
+    """
+    Memory-maps the on-disk row store of a modulus. It holds rows 0 to count-1 back to back in the data file, and
+    the start offset of every row plus the end of the last one as int64 in the offset file. Modular rows are stored
+    as their residues in the store_dtype() of the modulus, exact rows as the comma-separated decimal digits of their
+    first half, which text_row() would otherwise have to convert again.
+    Entries past the end of the data file (an interrupted write) are ignored.
+    :return: (count, offsets, data), count is 0 and the maps are None when there is no store yet.
+    """
+
+    data_path, index_path = row_store_paths(directory, modulus)
+    try:
+        offsets = np.memmap(index_path, dtype='<i8', mode='r')
+        data = np.memmap(data_path, dtype=np.uint8, mode='r')
+    except (OSError, ValueError):
+        return 0, None, None
+    count = max(int(np.searchsorted(offsets, len(data), side='right')) - 1, 0)
+    return count, offsets, data
+
+
+def read_stored_row(offsets, data, index, modulus):
+    """
+    Decodes row index from the memory-mapped row store, copied out of the maps so they can be released.
+    :return: The row like triangle_rows() caches it, an array with a modulus and a text_row() list without.
+    """
+
+    start, end = int(offsets[index]), int(offsets[index+1])
+    if modulus:
+        dtype = '<u' + str((end-start) // (index+1))  # Stores of older versions kept 8 bytes per residue.
+        return np.frombuffer(data, dtype=dtype, count=index+1, offset=start).copy()
+    half = [text_cell(cell) for cell in data[start:end].tobytes().decode('ascii').split(',')]
+    return half + half[:index+1-len(half)][::-1]
+
+
+def append_stored_rows(directory, modulus, count, rows):
+    """
+    Appends rows count onwards to the on-disk row store of a modulus, dropping whatever an interrupted write left
+    past row count-1 first.
+    :param count: Number of valid rows in the store, as returned by open_row_store().
+    :param rows: The rows count, count+1, ... like triangle_rows() caches them.
+    """
+
+    data_path, index_path = row_store_paths(directory, modulus)
+    os.makedirs(directory, exist_ok=True)
+    offsets = np.fromfile(index_path, dtype='<i8', count=count+1) if count else np.zeros(1, dtype='<i8')
+    if modulus:
+        blobs = [row.astype(store_dtype(modulus)).tobytes() for row in rows]
+    else:
+        blobs = [','.join(map(str, row[:(len(row)+1)//2])).encode('ascii') for row in rows]
+    ends = offsets[-1] + np.cumsum([len(blob) for blob in blobs], dtype=np.int64)
+    with open(data_path, 'ab') as data_file:
+        data_file.truncate(int(offsets[-1]))
+        data_file.writelines(blobs)
+    with open(index_path, 'ab') as index_file:
+        index_file.truncate(count*8)
+        index_file.write(np.concatenate([offsets[-1:], ends]).astype('<i8').tobytes())
+
 
 class AyxPlugin:
     """
@@ -31,6 +384,14 @@ class AyxPlugin:
         self.is_initialized = True
         self.output_anchor = None
         self.n_rows = None
+        self.start_row = None
+        self.processes = 1
+        self.modulus = 0
+        self.layout = None
+        self.cache_directory = None
+        self.update_only = False
+        self.cached_rows = 0
+        self.computed_rows = 0
 
 
     def pi_init(self, str_xml: str):
@@ -52,10 +413,51 @@ class AyxPlugin:
             self.n_rows = 5
             self.display_error_msg('Invalid number of rows! Defaulting to  5 rows.','warning')
 
-        # Limit the number of rows to 10000
-        if self.n_rows > 100:
-            self.n_rows = 100
-            self.display_error_msg('Maximum number of rows reached, capped at 100','warning')
+        # Only the rows from StartRow to NRows are generated.
+        temp_start_row = Et.fromstring(str_xml).find('StartRow').text if 'StartRow' in str_xml else None
+        try:
+            self.start_row = int(temp_start_row) if temp_start_row else 0
+        except ValueError:
+            self.start_row = 0
+            self.display_error_msg('Start row is not an integer! Starting from row 0.','warning')
+        if not 0 <= self.start_row <= self.n_rows:
+            self.display_error_msg('Start row '+str(self.start_row)+' is outside rows 0 to '+str(self.n_rows)+
+                                   '! Starting from row 0.','warning')
+            self.start_row = 0
+
+        # Coefficients mod Modulus, 0 or empty for the exact ones.
+        temp_modulus = Et.fromstring(str_xml).find('Modulus').text if 'Modulus' in str_xml else None
+        try:
+            self.modulus = int(temp_modulus) if temp_modulus else 0
+        except ValueError:
+            self.modulus = 0
+            self.display_error_msg('Modulus is not an integer! Returning the exact coefficients.','warning')
+        if self.modulus and not 2 <= self.modulus <= MAX_MODULUS:
+            self.modulus = 0
+            self.display_error_msg('Modulus has to be between 2 and 2^62! Returning the exact coefficients.','warning')
+
+        # Limit the number of rows to MAX_ROWS (MAX_MODULAR_ROWS with a modulus)
+        max_rows = MAX_MODULAR_ROWS if self.modulus else MAX_ROWS
+        if self.n_rows - self.start_row > max_rows:
+            self.n_rows = self.start_row + max_rows
+            self.display_error_msg('Maximum number of rows reached, capped at '+str(max_rows),'warning')
+
+        # Processes computing row chunks, 0 for one per core.
+        temp_processes = Et.fromstring(str_xml).find('Processes').text if 'Processes' in str_xml else None
+        try:
+            self.processes = int(temp_processes) if temp_processes else 1
+        except ValueError:
+            self.processes = 1
+            self.display_error_msg('Number of processes is not an integer! Using a single process.','warning')
+
+        # Staircase (one field per column of the triangle) or long (one record per coefficient).
+        self.layout = Et.fromstring(str_xml).find('Layout').text if 'Layout' in str_xml else 'staircase'
+
+        # Optional folder keeping the computed rows across runs and workflows.
+        self.cache_directory = Et.fromstring(str_xml).find('CacheDirectory').text if 'CacheDirectory' in str_xml else None
+
+        # Designer refreshing the metadata while the workflow is edited, the layout only depends on the configuration.
+        self.update_only = self.alteryx_engine.get_init_var(self.n_tool_id, 'UpdateOnly') == 'True'
             
             
         pass
@@ -89,23 +491,66 @@ class AyxPlugin:
         :return: False if there are issues with the input data or if the workflow isn't being ran, otherwise True.
         """
 
-        self.dataframe = self.Pascal(self.n_rows)
         record_info_out = self.build_record_info_out()  # Building out the outgoing record layout.
         self.output_anchor.init(record_info_out)  # Lets the downstream tools know of the outgoing record metadata.
         record_creator = record_info_out.construct_record_creator()  # Creating a new record_creator for the new data.
-        
-        for row in self.dataframe.index:
-            t=0
-            for column in self.dataframe.columns:
-                record_info_out[t].set_from_string(record_creator,str(self.dataframe.loc[row,column]))
-                t+=1
-        
-            out_record = record_creator.finalize_record()
-            self.output_anchor.push_record(out_record, False)  # False: completed connections will automatically close.
-            record_creator.reset()  # Resets the variable length data to 0 bytes (default) to prevent unexpected results.
+        fields = [record_info_out[t] for t in range(record_info_out.num_fields)]
+        # Coefficients that fit go in as int64, the wider ones through their decimal digits.
+        as_int = [field.type == Sdk.FieldType.int64 for field in fields]
+        n_records = 0
+        # Update-only (metadata) passes get the layout alone, as with a record limit of 0.
+        if self.update_only:
+            n_record_limit = 0
+        # Every record holds at least one coefficient, so a record limit (<0 for none) never needs more rows than it.
+        last = self.n_rows if n_record_limit < 0 else min(self.n_rows, self.start_row + n_record_limit - 1)
+
+        # Each row goes out as soon as it is computed, only one row of the triangle is held at a time.
+        if self.layout == 'long':
+            row_field, k_field, value_field = fields
+            # Row n holds n+1 records, so a record limit can end within a row: only the head of that row is needed,
+            # which skips converting the rest of a deep exact row to text.
+            head = None
+            if n_record_limit > 0:
+                last, head = self.start_row, n_record_limit
+                while last < self.n_rows and head > last+1:
+                    head -= last+1
+                    last += 1
+                head = head if head < last+1 else None
+            rows = self.triangle_rows(self.start_row, last, head)
+            for index, row in enumerate(rows, self.start_row):
+                if n_records + len(row) > n_record_limit >= 0:
+                    row = row[:n_record_limit - n_records]
+                for k, coefficient in enumerate(row):
+                    row_field.set_from_int64(record_creator, index)
+                    k_field.set_from_int64(record_creator, k)
+                    if as_int[2]:
+                        value_field.set_from_int64(record_creator, coefficient)
+                    else:
+                        value_field.set_from_string(record_creator, str(coefficient))
+                    out_record = record_creator.finalize_record()
+                    self.output_anchor.push_record(out_record, False)  # False: completed connections will automatically close.
+                    record_creator.reset()  # Resets the variable length data to 0 bytes (default) to prevent unexpected results.
+                    n_records += 1
+                if n_records == n_record_limit:
+                    break
+        else:
+            for cells in self.Pascal(self.n_rows, self.start_row, last):
+                for field, field_as_int, cell in zip(fields, as_int, cells):
+                    if cell == '':
+                        field.set_null(record_creator)
+                    elif field_as_int:
+                        field.set_from_int64(record_creator, cell)
+                    else:
+                        field.set_from_string(record_creator, str(cell))
+
+                out_record = record_creator.finalize_record()
+                self.output_anchor.push_record(out_record, False)  # False: completed connections will automatically close.
+                record_creator.reset()  # Resets the variable length data to 0 bytes (default) to prevent unexpected results.
+                n_records += 1
 
         self.alteryx_engine.output_message(self.n_tool_id, Sdk.EngineMessageType.info, self.xmsg(
-        str(self.n_rows)+' records were processed.'))
+        str(n_records)+' records were processed, '+str(self.cached_rows)+' rows came from the cache and '+
+        str(self.computed_rows)+' were computed.'))
         self.output_anchor.close()  # Close outgoing connections.
         return True
 
@@ -126,12 +571,44 @@ class AyxPlugin:
         """
 
         record_info_out = Sdk.RecordInfo(self.alteryx_engine)  # A fresh record info object for outgoing records.
-        #We are returning a dataframe with M rows and M*2 columns.
-        #self.n_columns = self.n_rows*2
-        for i in self.dataframe.columns:
-            record_info_out.add_field(str(i), Sdk.FieldType.string, 254)
+        # The largest coefficients are read off the last two rows, computed with pascal_row() (no math.comb before
+        # Python 3.8).
+        before_last = pascal_row(self.n_rows-1) if self.n_rows and not self.modulus else []
+        last_row = next_pascal_row(before_last) if not self.modulus else []
+        if self.layout == 'long':
+            #We are returning one record per coefficient: row index, k and the coefficient.
+            record_info_out.add_field('Row', Sdk.FieldType.int32)
+            record_info_out.add_field('K', Sdk.FieldType.int32)
+            self.add_coefficient_field(record_info_out, 'Value', self.modulus-1 if self.modulus else
+                                       last_row[self.n_rows//2])
+        else:
+            #We are returning M+1 rows and (M+1)*2-1 columns.
+            # Column i peaks on the last row that reaches it: row M for even columns, row M-1 for odd ones.
+            for i in range((self.n_rows+1)*2-1):
+                self.add_coefficient_field(record_info_out, str(i), self.modulus-1 if self.modulus else
+                                           (last_row, before_last)[i%2][i//2])
         return record_info_out
 
+    def add_coefficient_field(self, record_info_out: object, name: str, largest: int):
+        """
+        A non-interface helper for build_record_info_out() that adds the narrowest field able to hold the coefficients
+        of a column: int64 while they fit, then a fixed decimal, then a string as wide as the largest one.
+        :param record_info_out: The outgoing record layout.
+        :param name: The name of the field.
+        :param largest: The largest coefficient the field will hold.
+        """
+
+        # Digits from the bit length, converting the coefficient itself is quadratic in its size.
+        digits = int(largest.bit_length() * math.log10(2)) + 1
+        if digits > 1 and largest < 10**(digits-1):
+            digits -= 1
+        if largest <= INT64_MAX:
+            record_info_out.add_field(name, Sdk.FieldType.int64)
+        elif digits <= FIXED_DECIMAL_DIGITS:
+            record_info_out.add_field(name, Sdk.FieldType.fixeddecimal, digits, 0)
+        else:
+            record_info_out.add_field(name, Sdk.FieldType.v_string, digits)
+
     def display_error_msg(self, msg_string: str, msg_type: str):
         """
         A non-interface method, that is responsible for displaying the relevant error message in Designer.
@@ -155,20 +632,110 @@ class AyxPlugin:
 
         return msg_string
     
-    def Pascal(self, value):
-        '''Returns the Pascal Triangle up to the Row defined in the value'''
-        # Instantiate the df will need double the number of 
-        # columns as they don't stack
-        
-        df = pd.DataFrame(0, index= range(value+1), columns = range((value+1)*2-1)) 
-        for index in df.index:
-            diff = len(df) - (index+1) #calculate the step to add to the stair
-            for column in df.columns:
-                try:
-                    df.iloc[index,(column*2 + diff)] = int(scipy.special.binom(index, column))
-                except: pass
-        df.replace(to_replace=0,value='',inplace=True)# remove zeros
-        return df
+    def triangle_rows(self, first, last, head=None):
+        """
+        A non-interface helper that yields the rows first to last ready for the output fields: the exact rows through
+        text_row(), the modular ones as lists of ints. Rows in the in-process cache or the on-disk store are served
+        from there and only the rest is computed, by computed_rows_for().
+        Computed rows go in the in-process cache, and like the served ones in the on-disk store when they extend the
+        rows it holds.
+        With head, only the first head coefficients of the last row are yielded, by row_head().
+        Counts the rows of each kind in self.cached_rows and self.computed_rows.
+        """
+
+        self.cached_rows = self.computed_rows = 0
+        whole = last if head is None else last-1
+        count, offsets, data = open_row_store(self.cache_directory, self.modulus) if self.cache_directory else (0, None, None)
+        # Taken up front, as the rows this run caches can evict the ones it has yet to serve.
+        known = {}
+        for index in range(first, whole+1):
+            row = cached_row(self.modulus, index)
+            if row is not None:
+                known[index] = row
+        computed = self.computed_rows_for([index for index in range(max(first, count), whole+1) if index not in known])
+
+        to_store = []
+        for index in range(first, whole+1):
+            row = known.get(index)
+            if row is None and index < count:
+                row = read_stored_row(offsets, data, index, self.modulus)
+                cache_row(self.modulus, index, row)
+            if row is None:
+                row = next(computed)
+                cache_row(self.modulus, index, row)
+                self.computed_rows += 1
+            else:
+                self.cached_rows += 1
+            if self.cache_directory and index == count + len(to_store):
+                to_store.append(row)
+                if len(to_store) == ROW_CHUNK:
+                    offsets = data = None  # Releases the memory maps so the store can be appended to.
+                    count = self.store_rows(count, to_store)
+                    to_store = []
+            yield row.tolist() if self.modulus else row
+        offsets = data = None
+        if to_store:
+            self.store_rows(count, to_store)
+        if head is not None:
+            yield self.row_head(last, head)
+
+    def row_head(self, index, count):
+        """
+        A non-interface helper that returns the first count coefficients of a row ready for the output fields, like
+        triangle_rows() would, converting only those. Served from the in-process cache when it holds the row, and
+        left out of the caches otherwise as it isn't whole.
+        """
+
+        row = cached_row(self.modulus, index)
+        if row is not None:
+            self.cached_rows += 1
+            return row[:count].tolist() if self.modulus else row[:count]
+        self.computed_rows += 1
+        if self.modulus:
+            return next(pascal_rows_mod(index, index, self.modulus))[:count].tolist()
+        return text_cells(pascal_row(index)[:count])
+
+    def computed_rows_for(self, indices):
+        """
+        A non-interface helper for triangle_rows() that computes the given rows in order, each run of consecutive
+        rows from its own first row on: exact rows by pascal_text_rows(), modular ones as arrays.
+        :param indices: Indices of the rows, in increasing order.
+        """
+
+        if not self.modulus:
+            yield from pascal_text_rows(indices, self.processes)
+            return
+        runs = []
+        for index in indices:
+            if runs and runs[-1][1] == index-1:
+                runs[-1][1] = index
+            else:
+                runs.append([index, index])
+        for first, last in runs:
+            yield from pascal_rows_mod(first, last, self.modulus)
+
+    def store_rows(self, count, rows):
+        """
+        A non-interface helper for triangle_rows() that appends rows to the on-disk store, warning if it can't.
+        :return: The number of rows in the store afterwards.
+        """
+
+        try:
+            append_stored_rows(self.cache_directory, self.modulus, count, rows)
+        except OSError as error:
+            self.cache_directory = None
+            self.alteryx_engine.output_message(self.n_tool_id, Sdk.EngineMessageType.warning, self.xmsg(
+                'Could not write the cache to ' + str(error.filename) + ': ' + str(error.strerror)))
+        return count + len(rows)
+
+    def Pascal(self, value, first=0, last=None):
+        '''Yields the Pascal Triangle from the Row defined in first up to the Row defined in the value (or in last, if given), one staircase row at a time'''
+        # The rows will need double the number of columns as they don't stack,
+        # row n starts value-n columns in and its values go on every other column.
+        for index, row in enumerate(self.triangle_rows(first, value if last is None else last), first):
+            cells = [''] * ((value+1)*2-1)
+            cells[value-index:value+index+1:2] = row
+            yield cells
 
 
 class IncomingInterface:
@@ -0,0 +1,122 @@
+"""
+Compares the vectorised plinko_stat in PlinkoSDKEngine.py against the original cell-by-cell implementation.
+Needs the Python shipped with Alteryx (AlteryxPythonSDK has to be importable), run it from this folder:
+    python PlinkoSDKBenchmark.py
+"""
+
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from PlinkoSDKEngine import AyxPlugin, decimal_text
+
+# (slots, rows) board sizes to time, the legacy implementation is skipped above LEGACY_MAX_CELLS.
+BOARD_SIZES = [(10, 50), (25, 100), (50, 200), (100, 500), (500, 2000)]
+LEGACY_MAX_CELLS = 100000
+
+# Depths checked with the exact method: past 2^1024 the path counts overflow floats, past 4300 digits str() refuses them.
+EXACT_DEEP_ROWS = [1029, 15000]
+
+
+def legacy_plinko_stat(max_width, number_rows, starting_position):
+    "The original implementation of AyxPlugin.plinko_stat, kept as the baseline (float dtype for newer pandas)"
+    df = pd.DataFrame([range(1,max_width*2)]*number_rows, dtype=float)
+    for x in df.columns:
+        for y in df.index:
+            df.iloc[y,x] =0
+    count = 1
+    for y in df.columns:
+        if count ==starting_position:
+            df.iloc[0,y] = 1
+        count+=1
+
+    for x in df.index:
+        if x ==0:
+            pass
+        else:
+            for y in df.columns:
+                val = 0
+                try:
+                    if y-1 >=0:
+                        tempval = df.iloc[x-1,y-1]
+                    else: tempval = 0
+                except:
+                    tempval = 0
+
+                if y == 1:
+                    val +=(tempval)
+                else: val +=(tempval/2)
+                try:
+                    if y+1 <=max(df.columns):
+                        tempval = df.iloc[x-1,y+1]
+                    else: tempval = 0
+                except:
+                    tempval = 0
+                if y == max(df.columns)-1:
+                    val += tempval
+                else:           val +=(tempval/2)
+                df.iloc[x,y] = val
+    last_row = df.iloc[-1,][df.iloc[-1,]!=0]
+    return df, last_row
+
+
+def vectorised_plinko_stat(max_width, number_rows, starting_position):
+    "Runs the engine's plinko_stat outside of Designer"
+    plugin = AyxPlugin(0, None, None)
+    plugin.max_width = max_width
+    plugin.number_rows = number_rows
+    plugin.starting_pos = starting_position
+    return plugin.plinko_stat()
+
+
+def exact_plinko_stat(max_width, number_rows, starting_position):
+    "Runs the engine's exact method outside of Designer"
+    plugin = AyxPlugin(0, None, None)
+    plugin.max_width = max_width
+    plugin.number_rows = number_rows
+    plugin.starting_pos = starting_position
+    plugin.method = 'exact'
+    return plugin.plinko_stat()
+
+
+def check_exact_deep_boards():
+    "Checks the exact method on boards deep enough for path counts past floats and past str()"
+    for number_rows in EXACT_DEEP_ROWS:
+        (df, last_row), new_time = timed(exact_plinko_stat, 10, number_rows, 5)
+        assert len(df) == number_rows
+        assert sum(last_row.Paths) == 2**(number_rows-1)
+        assert np.isclose(last_row.Value.sum(), 1)
+        digits = max(len(decimal_text(paths)) for paths in last_row.Paths)
+        print('exact method, {} rows: {:.4f} s, {} digits in Paths'.format(number_rows, new_time, digits))
+
+
+def timed(function, *args):
+    "Returns the result of function(*args) and the seconds it took"
+    start = time.perf_counter()
+    result = function(*args)
+    return result, time.perf_counter() - start
+
+
+def main():
+    print('{:>7} {:>7} {:>12} {:>12} {:>9}'.format('slots', 'rows', 'legacy (s)', 'numpy (s)', 'speedup'))
+    for max_width, number_rows in BOARD_SIZES:
+        starting_position = max_width
+        (df, last_row), new_time = timed(vectorised_plinko_stat, max_width, number_rows, starting_position)
+        if number_rows * (max_width*2-1) > LEGACY_MAX_CELLS:
+            print('{:>7} {:>7} {:>12} {:>12.4f} {:>9}'.format(max_width, number_rows, '-', new_time, '-'))
+            continue
+        (legacy_df, legacy_last_row), legacy_time = timed(legacy_plinko_stat, max_width, number_rows,
+                                                          starting_position)
+        assert np.allclose(df.values, legacy_df.values.astype(float))
+        assert np.allclose(last_row.values, legacy_last_row.values.astype(float))
+        print('{:>7} {:>7} {:>12.4f} {:>12.4f} {:>8.0f}x'.format(max_width, number_rows, legacy_time, new_time,
+                                                                 legacy_time / new_time))
+    check_exact_deep_boards()
+
+
+if __name__ == '__main__':
+    main()
@@ -1,7 +1,168 @@
 import AlteryxPythonSDK as Sdk
 import xml.etree.ElementTree as Et
+import decimal
+import math
+import os
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+import numpy as np
 import pandas as pd
 
+# Number of balls simulated by each task of the process pool in the simulation method.
+SIMULATION_SHARD = 1000000
+
+# Largest seed of the simulation method, RandomState seeds are 32-bit.
+MAX_SEED = 2**32 - 1
+
+# Balls simulated per record asked for when a record limit is set, previews don't need the full Balls count.
+PREVIEW_BALLS = 1000
+
+# Path counts of row x add up to 2^x, so they fit in int64 up to this row.
+EXACT_INT64_ROWS = 62
+
+# In-process LRU of the cached rows per (slots, starting position), used by the cached method: up to PLINKO_CACHE_ROWS
+# rows by depth for each of PLINKO_CACHE_SIZE board shapes.
+PLINKO_CACHE = OrderedDict()
+PLINKO_CACHE_SIZE = 64
+PLINKO_CACHE_ROWS = 16
+
+
+def plinko_step(row, right=0.5):
+    """
+    Computes the next row of the board from the previous one in a single vectorised step.
+    Every cell sends half of its probability to each neighbour, except the two edge cells which bounce
+    everything back into the board.
+    :param row: Probabilities of the previous row (the slot axis has to be the first axis).
+    :param right: Probability of a ball bouncing to the right on a peg, for biased boards.
+    :return: Probabilities of the next row.
+    """
+
+    to_right = row * right
+    to_left = row * (1-right)
+    next_row = np.zeros_like(to_right)
+    if len(row) < 2:
+        return next_row
+    next_row[1:] += to_right[:-1]
+    next_row[:-1] += to_left[1:]
+    next_row[1] += to_left[0]
+    next_row[-2] += to_right[-1]
+    return next_row
+
+
+def simulate_balls(width, number_rows, start, balls, right, seed):
+    """
+    Drops balls down the board as vectorised random walks, with the same edge reflection as plinko_step().
+    Module level so it can be sent to the worker processes.
+    :param width: Number of cells in a row of the board.
+    :param number_rows: Number of rows of the board.
+    :param start: Starting position of every ball.
+    :param balls: Number of balls to drop.
+    :param right: Probability of a ball bouncing to the right on a peg.
+    :param seed: Seed of the random generator, a (base seed, shard) pair for the shards of plinko_simulation().
+    :return: Number of balls ending in each cell of the last row.
+    """
+
+    counts = np.zeros(width, dtype=np.int64)
+    if not 0 < start <= width or (width < 2 and number_rows > 1):
+        return counts
+    rng = np.random.RandomState(seed)  # Not default_rng(), the Generator API needs numpy 1.17.
+    position = np.full(balls, start-1, dtype=np.int32)
+    for x in range(1, number_rows):
+        position += 2*(rng.random_sample(balls) < right) - 1
+        # Bounce the balls that left the board back in: -1 becomes 1 and width becomes width-2.
+        np.abs(position, out=position)
+        np.minimum(position, 2*(width-1) - position, out=position)
+    return counts + np.bincount(position, minlength=width)
+
+
+def count_step(counts):
+    """
+    Integer version of plinko_step(): with row x scaled by 2^x, every cell passes its path count to both neighbours
+    and the edge cells pass it twice to their only neighbour.
+    :param counts: Path counts of the previous row, int64 or Python ints in an object array.
+    :return: Path counts of the next row.
+    """
+
+    next_counts = np.zeros_like(counts)
+    if len(counts) < 2:
+        return next_counts
+    next_counts[1:] += counts[:-1]
+    next_counts[:-1] += counts[1:]
+    next_counts[1] += counts[0]
+    next_counts[-2] += counts[-1]
+    return next_counts
+
+
+def path_probabilities(counts, x):
+    """
+    Divides the path counts of row x by 2^x without a float division of Python ints: the counts are shifted down to
+    their top 64 bits and the rest of the power of two goes in the exponent, so counts of any size work and
+    probabilities under the smallest double come out as 0.
+    :param counts: Path counts of row x, int64 or Python ints in an object array.
+    :param x: Index of the row.
+    :return: The probabilities, as a float array.
+    """
+
+    if counts.dtype != object:
+        return np.ldexp(counts.astype(float), -x)
+    shift = max(max(counts, default=0).bit_length() - 64, 0)
+    return np.ldexp((counts >> shift).astype(float), shift - x)
+
+
+def decimal_text(value):
+    "str() for the text fields, Python ints through Decimal as newer Pythons refuse str() past 4300 digits"
+    return str(decimal.Decimal(value)) if type(value) is int else str(value)
+
+
+def transition_matrix(width):
+    """
+    Builds the single-row transition matrix of a board, including the edge-reflection rule.
+    :param width: Number of cells in a row of the board.
+    :return: A width x width matrix, column j holds where the probability of cell j ends up on the next row.
+    """
+
+    return plinko_step(np.eye(width))
+
+
+def advance(transition, row, steps):
+    """
+    Moves a row a number of rows down the board by exponentiation by squaring of the transition matrix.
+    :param transition: The single-row transition matrix from transition_matrix().
+    :param row: Probabilities of the current row.
+    :param steps: How many rows to move down.
+    :return: Probabilities of the row steps rows further down.
+    """
+
+    power = transition
+    while steps:
+        if steps & 1:
+            row = power @ row
+        steps >>= 1
+        if steps:
+            power = power @ power
+    return row
+
+
+def plinko_batch(max_width, number_rows, starts):
+    """
+    Computes the last row of one board shape for many starting positions in a single batched pass.
+    :param max_width: Number of slots of the board.
+    :param number_rows: Number of rows of the board.
+    :param starts: Starting positions, one per column of the result.
+    :return: A (max_width*2-1) x len(starts) array, column i holds the last row for starts[i].
+    """
+
+    width = max_width*2-1
+    starts = np.asarray(starts)
+    state = np.zeros((width, len(starts)))
+    valid = (starts > 0) & (starts <= width)
+    state[starts[valid]-1, np.flatnonzero(valid)] = 1
+    for x in range(1, number_rows):
+        state = plinko_step(state)
+    return state
+
+
 class AyxPlugin:
     """
     Implements the plugin interface methods, to be utilized by the Alteryx engine to communicate with a plugin.
@@ -25,7 +186,16 @@ class AyxPlugin:
         self.max_width = None
         self.number_rows = None
         self.starting_pos = None
-        #self.input: IncomingInterface = None
+        self.method = None
+        self.checkpoint_rows = None
+        self.balls = None
+        self.seed = None
+        self.bias = None
+        self.processes = None
+        self.cache_directory = None
+        self.record_limit = -1
+        self.update_only = False
+        self.input: IncomingInterface = None
         self.DataFrame: Sdk.OutputAnchor = None
         self.LastRow: Sdk.OutputAnchor = None
 
@@ -40,18 +210,34 @@ class AyxPlugin:
         self.max_width = int(Et.fromstring(str_xml).find('NumberSlots').text) if 'NumberSlots' in str_xml else None
         self.number_rows = int(Et.fromstring(str_xml).find('NumberRows').text) if 'NumberRows' in str_xml else None
         self.starting_pos = int(Et.fromstring(str_xml).find('StartingPos').text) if 'StartingPos' in str_xml else None
+        self.method = Et.fromstring(str_xml).find('Method').text if 'Method' in str_xml else 'rows'
+        self.checkpoint_rows = int(Et.fromstring(str_xml).find('CheckpointRows').text or 0) if 'CheckpointRows' in str_xml else 0
+        self.balls = int(Et.fromstring(str_xml).find('Balls').text or 1000000) if 'Balls' in str_xml else 1000000
+        self.seed = int(Et.fromstring(str_xml).find('Seed').text or 0) if 'Seed' in str_xml else 0
+        self.bias = float(Et.fromstring(str_xml).find('Bias').text or 0.5) if 'Bias' in str_xml else 0.5
+        self.processes = int(Et.fromstring(str_xml).find('Processes').text or 0) if 'Processes' in str_xml else 0
+        if not 0 <= self.seed <= MAX_SEED:
+            self.seed = 0
+            self.alteryx_engine.output_message(self.n_tool_id, Sdk.EngineMessageType.warning, self.xmsg(
+                'Seed has to be between 0 and ' + str(MAX_SEED) + '! Using seed 0.'))
+        self.cache_directory = Et.fromstring(str_xml).find('CacheDirectory').text if 'CacheDirectory' in str_xml else None
 
         # Valid checks.
         if self.starting_pos is None:
             self.display_error_msg('Starting Position cannot be empty.')
         elif self.starting_pos > self.max_width:
             self.display_error_msg('Starting Position cannot be greater than the number of slots.')
+        elif self.checkpoint_rows < 0:
+            self.display_error_msg('Checkpoint every N rows cannot be negative.')
+        elif not 0 <= self.bias <= 1:
+            self.display_error_msg('Peg bias has to be a probability between 0 and 1.')
 
         # Getting the output anchor from Config.xml by the output connection name
         self.LastRow = self.output_anchor_mgr.get_output_anchor('LastRow')
+
+        # Designer refreshing the metadata while the workflow is edited, only the record layouts are needed.
+        self.update_only = self.alteryx_engine.get_init_var(self.n_tool_id, 'UpdateOnly') == 'True'
         self.DataFrame = self.output_anchor_mgr.get_output_anchor('DataFrame')
-        
-        self.df, self.last_row = self.plinko_stat()
 
 
     def pi_add_incoming_connection(self, str_type: str, str_name: str) -> object:
@@ -62,7 +248,9 @@ class AyxPlugin:
         :param str_name: The name of the wire, defined by the workflow author.
         :return: The IncomingInterface object(s).
         """
-        return self
+
+        self.input = IncomingInterface(self)
+        return self.input
 
     def pi_add_outgoing_connection(self, str_name: str) -> bool:
         """
@@ -80,56 +268,62 @@ class AyxPlugin:
         Called when a tool has no incoming data connection.
         :return: False if there's an error with the field name, otherwise True.
         """
-        
-        ##Exporting the dataframe:
-        # Save a reference to the RecordInfo passed into this function in the global namespace, so we can access it later.
-        record_info_out = self.build_record_info_out(self.df)  # Building out the outgoing record layout.
 
-        # Lets the downstream tools know what the outgoing record metadata will look like, based on record_info_out.
-        self.DataFrame.init(record_info_out)
+        # With a record limit (<0 for none) only the board rows it asks for are kept, with 0 nothing is computed and
+        # the layouts come from the configuration alone, as they do on update-only (metadata) passes.
+        self.record_limit = 0 if self.update_only else n_record_limit
+        if self.record_limit == 0:
+            self.df, self.last_row = self.plinko_schema()
+        else:
+            self.df, self.last_row = self.plinko_stat()
+        self.push_dataframe(self.DataFrame, self.df)
+        if isinstance(self.last_row, pd.DataFrame):
+            self.push_dataframe(self.LastRow, self.last_row)
+        else:
+            self.push_dataframe(self.LastRow, self.last_row.rename_axis('Position').reset_index(name='Value'))
+        return True
 
-        # Creating a new, empty record creator based on record_info_out's record layout.
-        record_creator = record_info_out.construct_record_creator()    
-        for row in self.df.index:
-            t=0
-            for column in self.df.columns:
-                record_info_out[t].set_from_string(record_creator,str(self.df.loc[row,column]))
-                t+=1
-        
-            out_record = record_creator.finalize_record()
-            self.DataFrame.push_record(out_record, False)  # False: completed connections will automatically close.
-            record_creator.reset()  # Resets the variable length data to 0 bytes (default) to prevent unexpected results.
-            
-        # Make sure that the output anchor is closed.
-        self.DataFrame.close()
+    def push_dataframe(self, anchor: object, df: object):
+        """
+        A non-interface helper for pi_push_all_records() that pushes every row of a DataFrame out of an anchor.
+        :param anchor: The output anchor to push the records to.
+        :param df: The DataFrame to push, one outgoing field per column.
+        """
 
-        
-        ##Exporting the lastrow:
         # Save a reference to the RecordInfo passed into this function in the global namespace, so we can access it later.
-        record_info_out = self.build_record_info_out(self.last_row)  # Building out the outgoing record layout.
+        record_info_out = self.build_record_info_out(df)  # Building out the outgoing record layout.
 
         # Lets the downstream tools know what the outgoing record metadata will look like, based on record_info_out.
-        self.LastRow.init(record_info_out)
+        anchor.init(record_info_out)
+        if self.record_limit >= 0:
+            df = df.iloc[:self.record_limit]
+
+        # Picking the typed setter of each field once, numbers go in as they are instead of through str().
+        setters = []
+        columns = []
+        for t, column in enumerate(df.columns):
+            if df[column].dtype.kind == 'f':
+                setters.append(record_info_out[t].set_from_double)
+                columns.append(df[column].tolist())
+            elif df[column].dtype.kind in 'iu':
+                setters.append(record_info_out[t].set_from_int64)
+                columns.append(df[column].tolist())
+            else:
+                setters.append(record_info_out[t].set_from_string)
+                columns.append([decimal_text(value) for value in df[column]])
 
         # Creating a new, empty record creator based on record_info_out's record layout.
         record_creator = record_info_out.construct_record_creator()    
-        for row in self.last_row.index:
-            record_info_out[0].set_from_string(record_creator,str(row))
-            record_info_out[1].set_from_string(record_creator,str(self.last_row[row]))
-
-            
+        for values in zip(*columns):
+            for setter, value in zip(setters, values):
+                setter(record_creator, value)
         
             out_record = record_creator.finalize_record()
-            self.LastRow.push_record(out_record, False)  # False: completed connections will automatically close.
-            #self.output_anchor.push_record(out_record, False)  # False: completed connections will automatically close.
+            anchor.push_record(out_record, False)  # False: completed connections will automatically close.
             record_creator.reset()  # Resets the variable length data to 0 bytes (default) to prevent unexpected results.
             
         # Make sure that the output anchor is closed.
-        self.LastRow.close()
-        #self.output_anchor.close()
-        
-        
-        return True
+        anchor.close()
 
     def build_record_info_out(self,obj):
         """
@@ -140,12 +334,18 @@ class AyxPlugin:
 
         record_info_out = Sdk.RecordInfo(self.alteryx_engine)  # A fresh record info object for outgoing records.
         #We are returning a dataframe with M rows and M*2 columns.
-        try:
-            for i in obj.columns:
+        for i in obj.columns:
+            if i in ('Row', 'ScenarioId', 'Count'):
+                record_info_out.add_field(i, Sdk.FieldType.int64)
+            elif i in ('Slots', 'Rows', 'Start', 'Position'):
+                record_info_out.add_field(i, Sdk.FieldType.int32)
+            elif i == 'Paths' and self.number_rows-1 > EXACT_INT64_ROWS:
+                # Path counts past int64 go out as their exact decimal digits, at most those of 2^(rows-1).
+                record_info_out.add_field(i, Sdk.FieldType.v_string, int((self.number_rows-1) * math.log10(2)) + 1)
+            elif i == 'Paths':
+                record_info_out.add_field(i, Sdk.FieldType.int64)
+            else:
                 record_info_out.add_field(str(i), Sdk.FieldType.float)
-        except:
-            record_info_out.add_field(str('Position'), Sdk.FieldType.int16)
-            record_info_out.add_field(str('Value'), Sdk.FieldType.float)
 
         return record_info_out    
     
@@ -180,48 +380,329 @@ class AyxPlugin:
     
     def plinko_stat(self):
         "Will generate the DF with all possibilities based on starting and ending positions"
-        max_width = self.max_width
-        number_rows = self.number_rows
-        starting_position = self.starting_pos
-        df = pd.DataFrame([range(1,max_width*2)]*number_rows)
-        for x in df.columns:
-            for y in df.index:
-                df.iloc[y,x] =0
-        count = 1
-        for y in df.columns:
-            if count ==starting_position:
-                df.iloc[0,y] = 1
-            count+=1
-
-        for x in df.index:
-            if x ==0:
-                pass
-            else:
-                for y in df.columns:
-                    val = 0
-                    try:
-                        if y-1 >=0:
-                            tempval = df.iloc[x-1,y-1]
-                        else: tempval = 0
-                    except:
-                        tempval = 0
-
-                    if y == 1:
-                        val +=(tempval)
-                    else: val +=(tempval/2)
-                    try:
-                        if y+1 <=max(df.columns):
-                            tempval = df.iloc[x-1,y+1]
-                        else: tempval = 0
-                    except:
-                        tempval = 0
-                    if y == max(df.columns)-1:
-                        val += tempval
-                    else:           val +=(tempval/2)
-                    df.iloc[x,y] = val
+        if self.method == 'matrix':
+            return self.plinko_stat_matrix()
+        if self.method == 'band':
+            return self.plinko_stat_band()
+        if self.method == 'all_starts':
+            return self.plinko_stat_all_starts()
+        if self.method == 'simulation':
+            return self.plinko_simulation()
+        if self.method == 'cached':
+            return self.plinko_stat_cached()
+        if self.method == 'exact':
+            return self.plinko_stat_exact()
+        # A record limit stops the board at its last stored row, LastRow is then that row.
+        board = np.zeros((self.stored_rows(), self.max_width*2-1))
+        row = self.starting_row()
+        for x in range(len(board)):
+            if x:
+                row = plinko_step(row)
+            board[x] = row
+        self.note_preview(len(board)-1)
+        df = pd.DataFrame(board)
+        last_row = pd.Series(row)[row!=0]
+        return df, last_row
+
+    def plinko_stat_matrix(self):
+        """
+        Matrix-power version of plinko_stat() for very deep boards, O(width^3 log rows) instead of O(width rows).
+        Only the checkpoint rows (every self.checkpoint_rows rows, plus the last one) make it into the DF,
+        with their row number in the Row column.
+        """
+
+        transition = transition_matrix(self.max_width*2-1)
+        last = max(self.number_rows-1, 0)  # A board with no rows still starts at row 0.
+        every = self.checkpoint_rows if self.checkpoint_rows > 0 else max(last, 1)
+        sampled = list(range(0, last, every)) + [last]
+        if self.record_limit > 0:
+            # Only the checkpoints a record limit reaches are computed, LastRow is then the last of them.
+            sampled = sampled[:self.record_limit]
+            self.note_preview(sampled[-1])
+        every_matrix = np.linalg.matrix_power(transition, every)
+
+        row = self.starting_row()
+        rows = [row]
+        for previous, current in zip(sampled, sampled[1:]):
+            steps = current - previous
+            row = every_matrix @ row if steps == every else advance(transition, row, steps)
+            rows.append(row)
+        df = pd.DataFrame(rows, index=sampled)
         last_row = df.iloc[-1,][df.iloc[-1,]!=0]
+        df.insert(0, 'Row', sampled)
         return df, last_row
 
+    def plinko_stat_band(self):
+        """
+        Band-limited version of plinko_stat() for wide boards. After r rows only the cells within r of the starting
+        position can be non-zero, so only that window is stored and stepped, O(rows min(width, rows)).
+        The DF comes back in long form, one (Row, Position, Value) record per non-zero cell.
+        """
+
+        width = self.max_width*2-1
+        lo = hi = self.starting_pos-1
+        band = np.ones(1) if 0 <= lo < width else np.zeros(0)
+        rows, positions, values = [], [], []
+        # A record limit stops the board at its last stored row, LastRow is then that row.
+        for r in range(self.stored_rows()):
+            if r and len(band):
+                # Grow the window by one cell on each side that is not already a board edge.
+                new_lo, new_hi = max(lo-1, 0), min(hi+1, width-1)
+                padded = np.zeros(new_hi-new_lo+1)
+                padded[lo-new_lo:lo-new_lo+len(band)] = band
+                band = plinko_step(padded)
+                lo, hi = new_lo, new_hi
+            non_zero = np.flatnonzero(band)
+            rows.append(np.full(len(non_zero), r))
+            positions.append(non_zero + lo)
+            values.append(band[non_zero])
+        # A board with no rows leaves the lists empty, the DF is then empty and LastRow is the starting row.
+        empty = [np.zeros(0, dtype=np.int64)]
+        df = pd.DataFrame({'Row': np.concatenate(rows or empty),
+                           'Position': np.concatenate(positions or empty),
+                           'Value': np.concatenate(values or [np.zeros(0)])})
+        self.note_preview(len(rows)-1)
+        non_zero = np.flatnonzero(band)
+        last_row = pd.Series(band[non_zero], index=non_zero + lo)
+        return df, last_row
+
+    def plinko_stat_all_starts(self):
+        """
+        Propagates every starting position at once, one column of an identity matrix per starting slot, through the
+        rows of the board. The DF holds the board for StartingPos, LastRow the full start-by-end matrix in long
+        (Start, Position, Value) form, limited to the starts a record limit reaches.
+        """
+
+        width = self.max_width*2-1
+        board = np.zeros((self.stored_rows(), width))
+        row = self.starting_row()
+        for x in range(len(board)):
+            if x:
+                row = plinko_step(row)
+            board[x] = row
+        df = pd.DataFrame(board)
+
+        # Every start ends with at least one non-zero cell, so a record limit only needs that many starts.
+        starts = self.max_width if self.record_limit < 0 else min(self.max_width, self.record_limit)
+        state = np.eye(width)[:, :starts]
+        for x in range(1, self.number_rows):
+            state = plinko_step(state)
+        start, position = np.nonzero(state.T)
+        last_row = pd.DataFrame({'Start': start+1, 'Position': position, 'Value': state[position, start]})
+        return df, last_row
+
+    def plinko_simulation(self):
+        """
+        Monte Carlo version of plinko_stat(), also valid for boards with a peg bias. The balls are split in shards of
+        SIMULATION_SHARD, each seeded with the seed and its own index so results do not depend on the number of
+        processes, and the shards run across a process pool.
+        The DF holds the exact (biased) board, LastRow the empirical Count and Value next to the Exact probability.
+        """
+
+        width = self.max_width*2-1
+        board = np.zeros((self.stored_rows(), width))
+        row = self.starting_row()
+        for x in range(self.number_rows):
+            if x:
+                row = plinko_step(row, self.bias)
+            if x < len(board):
+                board[x] = row
+
+        # With a record limit only PREVIEW_BALLS balls per record are dropped.
+        balls = self.balls if self.record_limit < 0 else min(self.balls, self.record_limit * PREVIEW_BALLS)
+        shards = [min(SIMULATION_SHARD, balls-done) for done in range(0, balls, SIMULATION_SHARD)]
+        seeds = [[self.seed, shard] for shard in range(len(shards))]
+        jobs = ([width]*len(shards), [self.number_rows]*len(shards), [self.starting_pos]*len(shards), shards,
+                [self.bias]*len(shards), seeds)
+        counts = None
+        if self.processes != 1 and len(shards) > 1:
+            try:
+                with ProcessPoolExecutor(self.processes or None) as pool:
+                    counts = sum(pool.map(simulate_balls, *jobs), np.zeros(width, dtype=np.int64))
+            except (OSError, BrokenProcessPool) as error:
+                self.alteryx_engine.output_message(self.n_tool_id, Sdk.EngineMessageType.warning, self.xmsg(
+                    'Process pool unavailable (' + str(error) + '), simulating in a single process.'))
+        if counts is None:
+            counts = sum(map(simulate_balls, *jobs), np.zeros(width, dtype=np.int64))
+
+        last_row = pd.DataFrame({'Position': np.arange(width), 'Count': counts,
+                                 'Value': counts / max(balls, 1), 'Exact': row})
+        last_row = last_row[(last_row.Count != 0) | (last_row.Exact != 0)].reset_index(drop=True)
+        last_row['Deviation'] = (last_row.Value - last_row.Exact).abs()
+        self.alteryx_engine.output_message(self.n_tool_id, Sdk.EngineMessageType.info, self.xmsg(
+            str(balls) + ' balls simulated, max deviation from the exact distribution: '
+            + str(last_row.Deviation.max() if len(last_row) else 0.0)))
+        return pd.DataFrame(board), last_row
+
+    def plinko_stat_exact(self):
+        """
+        Exact version of plinko_stat() on integer path counts, row x being scaled by 2^x. Counts stay in int64 up to
+        EXACT_INT64_ROWS and move to Python ints after that, the probabilities are only divided out for the outputs,
+        by path_probabilities(). LastRow carries the exact Paths next to the Value, Paths / 2^(rows-1), as Python ints
+        in an object column so pandas doesn't turn them into floats.
+        """
+
+        counts = np.zeros(self.max_width*2-1, dtype=np.int64)
+        if 0 < self.starting_pos <= len(counts):
+            counts[self.starting_pos-1] = 1
+        board = [path_probabilities(counts, 0)][:self.stored_rows()]
+        # A record limit stops the board at its last stored row, LastRow is then that row.
+        last = max(self.stored_rows()-1, 0)
+        for x in range(1, last+1):
+            if x > EXACT_INT64_ROWS and counts.dtype != object:
+                counts = counts.astype(object)
+            counts = count_step(counts)
+            board.append(path_probabilities(counts, x))
+        self.note_preview(last)
+        df = pd.DataFrame(board, columns=range(len(counts)))
+
+        # The Paths field is text past EXACT_INT64_ROWS rows, a preview row short of that still goes out as text.
+        paths_as_text = self.number_rows-1 > EXACT_INT64_ROWS
+        position = np.flatnonzero(counts)
+        last_row = pd.DataFrame({'Position': position,
+                                 'Value': path_probabilities(counts[position], last),
+                                 'Paths': pd.Series(counts[position], dtype=object if paths_as_text else counts.dtype)})
+        return df, last_row
+
+    def plinko_stat_cached(self):
+        """
+        Last-row-only version of plinko_stat() that carries on from the deepest row cached for the same slots and
+        starting position that is not past the requested one, instead of starting from row 0. Rows at power-of-two
+        depths are cached on the way down, so a shallower request than a cached one only recomputes from the closest
+        of them. The DF holds just the last row, with its Row number.
+        """
+
+        key = (self.max_width, self.starting_pos)
+        # A board with no rows still starts at row 0, a record limit stops the board at its last stored row.
+        last = max(self.stored_rows()-1, 0)
+        self.note_preview(last)
+        cached = self.cache_lookup(key)
+        depth = max((cached_depth for cached_depth in cached if cached_depth <= last), default=None)
+        if depth is None:
+            depth, row = 0, self.starting_row()
+            self.alteryx_engine.output_message(self.n_tool_id, Sdk.EngineMessageType.info, self.xmsg(
+                'Cache miss, computing all ' + str(last) + ' rows.'))
+        else:
+            row = cached[depth]
+            self.alteryx_engine.output_message(self.n_tool_id, Sdk.EngineMessageType.info, self.xmsg(
+                'Cache hit at row ' + str(depth) + ', computing ' + str(last-depth) + ' more rows.'))
+        computed = {}
+        for x in range(depth+1, last+1):
+            row = plinko_step(row)
+            if not x & (x-1):
+                computed[x] = row
+        computed[last] = row
+        self.cache_store(key, cached, computed)
+
+        df = pd.DataFrame([row], index=[last])
+        last_row = df.iloc[-1,][df.iloc[-1,]!=0]
+        df.insert(0, 'Row', [last])
+        return df, last_row
+
+    def cache_lookup(self, key):
+        """
+        Gathers the cached rows for key, in memory and on disk.
+        :param key: (slots, starting position) of the board.
+        :return: A dict of the cached rows by depth, empty if there are none.
+        """
+
+        cached = dict(PLINKO_CACHE.get(key, {}))
+        if self.cache_directory:
+            try:
+                with np.load(self.cache_path(key)) as stored:
+                    cached.update(zip(stored['depths'].tolist(), stored['rows']))
+            except (OSError, KeyError, ValueError):
+                pass
+        if key in PLINKO_CACHE:
+            PLINKO_CACHE.move_to_end(key)
+        return cached
+
+    def cache_store(self, key, cached, computed):
+        """
+        Keeps the PLINKO_CACHE_ROWS deepest rows for key in the in-process LRU, and on disk when a cache directory is
+        set. Deeper rows already cached are kept, a shallower run never replaces them.
+        :param key: (slots, starting position) of the board.
+        :param cached: The rows returned by cache_lookup(), by depth.
+        :param computed: The rows computed by this run, by depth.
+        """
+
+        rows = dict(cached)
+        rows.update(computed)
+        rows = {depth: rows[depth] for depth in sorted(rows)[-PLINKO_CACHE_ROWS:]}
+        PLINKO_CACHE[key] = rows
+        PLINKO_CACHE.move_to_end(key)
+        while len(PLINKO_CACHE) > PLINKO_CACHE_SIZE:
+            PLINKO_CACHE.popitem(last=False)
+        if self.cache_directory and not computed.keys() <= cached.keys():
+            try:
+                os.makedirs(self.cache_directory, exist_ok=True)
+                temp_path = self.cache_path(key) + '.tmp.npz'
+                np.savez(temp_path, depths=np.array(list(rows), dtype=np.int64), rows=np.array(list(rows.values())))
+                os.replace(temp_path, self.cache_path(key))
+            except OSError as error:
+                self.alteryx_engine.output_message(self.n_tool_id, Sdk.EngineMessageType.warning, self.xmsg(
+                    'Could not write the cache to ' + self.cache_directory + ': ' + str(error)))
+
+    def cache_path(self, key):
+        "Returns the on-disk cache file for a (slots, starting position) key"
+        return os.path.join(self.cache_directory, 'plinko_' + str(key[0]) + '_' + str(key[1]) + '.npz')
+
+    def plinko_scenarios(self, scenarios, scenario_ids=None):
+        """
+        Computes a batch of scenarios from the incoming connection, one batched pass per board shape.
+        :param scenarios: List of (slots, rows, start) tuples.
+        :param scenario_ids: The ScenarioId of each scenario, by default its position in the list plus one.
+        :return: The scenarios DF (ScenarioId, Slots, Rows, Start) and their last rows in long
+        (ScenarioId, Position, Value) form.
+        """
+
+        df = pd.DataFrame(scenarios, columns=['Slots', 'Rows', 'Start'], dtype='int64')
+        df.insert(0, 'ScenarioId', np.arange(1, len(df)+1) if scenario_ids is None else
+                  np.array(scenario_ids, dtype='int64'))
+        last_rows = [pd.DataFrame({'ScenarioId': [], 'Position': [], 'Value': []})]
+        for (max_width, number_rows), group in df.groupby(['Slots', 'Rows'], sort=False):
+            starts, column_of = np.unique(group.Start.values, return_inverse=True)
+            state = plinko_batch(max_width, number_rows, starts)[:, column_of]
+            scenario, position = np.nonzero(state.T)
+            last_rows.append(pd.DataFrame({'ScenarioId': group.ScenarioId.values[scenario], 'Position': position,
+                                           'Value': state[position, scenario]}))
+        last_row = pd.concat(last_rows).astype({'ScenarioId': 'int64', 'Position': 'int64'})
+        return df, last_row.sort_values(['ScenarioId', 'Position']).reset_index(drop=True)
+
+    def stored_rows(self):
+        "Number of board rows the DF needs, all of them unless the record limit asks for fewer"
+        return self.number_rows if self.record_limit < 0 else min(self.number_rows, self.record_limit)
+
+    def note_preview(self, depth):
+        "Tells the user LastRow holds row depth, when a record limit stopped the board short of its last row"
+        if depth < self.number_rows-1:
+            self.alteryx_engine.output_message(self.n_tool_id, Sdk.EngineMessageType.info, self.xmsg(
+                'Record limit set, LastRow holds row ' + str(depth) + ' instead of row ' + str(self.number_rows-1) +
+                '.'))
+
+    def plinko_schema(self):
+        """
+        Returns empty versions of the DF and LastRow plinko_stat() returns for the configured method, with the same
+        columns, so the outgoing record layouts can be built without computing the board.
+        """
+
+        board = pd.DataFrame(columns=range(self.max_width*2-1), dtype=float)
+        if self.method in ('matrix', 'cached'):
+            board.insert(0, 'Row', pd.Series(dtype='int64'))
+        if self.method == 'band':
+            board = pd.DataFrame({'Row': [], 'Position': [], 'Value': []})
+        columns = {'all_starts': ['Start', 'Position', 'Value'],
+                   'simulation': ['Position', 'Count', 'Value', 'Exact', 'Deviation'],
+                   'exact': ['Position', 'Value', 'Paths']}.get(self.method, ['Position', 'Value'])
+        return board, pd.DataFrame(columns=columns)
+
+    def starting_row(self):
+        "Returns the first row of the board, with all the probability in the starting position"
+        row = np.zeros(self.max_width*2-1)
+        if 0 < self.starting_pos <= len(row):
+            row[self.starting_pos-1] = 1
+        return row
+
 
 class IncomingInterface:
     """
@@ -235,36 +716,69 @@ class IncomingInterface:
         Constructor for IncomingInterface.
         :param parent: AyxPlugin
         """
-        pass
+
+        # Default properties
+        self.parent = parent
+
+        # Custom properties
+        self.record_info_in = None
+        self.scenario_fields = None
+        self.scenarios = []
+        self.scenario_ids = []
+        self.n_scenarios = 0
 
     def ii_init(self, record_info_in: object) -> bool:
         """
-        Handles appending the new field to the incoming data.
+        Looks up the Slots, Rows and Start fields of the incoming scenarios.
         Called to report changes of the incoming connection's record metadata to the Alteryx engine.
         :param record_info_in: A RecordInfo object for the incoming connection's fields.
         :return: False if there's an error with the field name, otherwise True.
         """
-        pass
+
+        self.record_info_in = record_info_in
+        self.scenario_fields = [record_info_in.get_field_by_name(name, False) for name in ('Slots', 'Rows', 'Start')]
+        if None in self.scenario_fields:
+            self.parent.display_error_msg('The scenario input needs Slots, Rows and Start fields.')
+            return False
+        return True
     
     def ii_push_record(self, in_record: object) -> bool:
         """
-        Responsible for pushing records out.
+        Buffers the scenario, the computation happens in one go in ii_close(). Scenarios are numbered in the order
+        they come in, a rejected one keeps its ScenarioId out of the results.
         Called when an input record is being sent to the plugin.
         :param in_record: The data for the incoming record.
-        :return: False if there's a downstream error, or if there's an error with the field name, otherwise True.
+        :return: False if the scenario is not valid, otherwise True.
         """
-        pass
+
+        self.n_scenarios += 1
+        scenario = tuple(field.get_as_int64(in_record) for field in self.scenario_fields)
+        if None in scenario or scenario[0] < 1 or scenario[1] < 1:
+            self.parent.display_error_msg('Scenario ' + str(self.n_scenarios) + ' needs at least one slot and one row.')
+            return False
+        if not 1 <= scenario[2] <= scenario[0]:
+            # Same check as pi_init() applies to the StartingPos of the configuration.
+            self.parent.display_error_msg('Scenario ' + str(self.n_scenarios) + ' has Start ' + str(scenario[2]) +
+                                          ', it has to be between 1 and its ' + str(scenario[0]) + ' slots.')
+            return False
+        self.scenarios.append(scenario)
+        self.scenario_ids.append(self.n_scenarios)
+        return True
     
     def ii_update_progress(self, d_percent: float):
         """
         Called by the upstream tool to report what percentage of records have been pushed.
         :param d_percent: Value between 0.0 and 1.0.
         """
-        pass
+
+        self.parent.alteryx_engine.output_tool_progress(self.parent.n_tool_id, d_percent)  # Inform the Alteryx engine of the tool's progress
     
     def ii_close(self):
         """
+        Computes every buffered scenario, grouped by board shape, and pushes the results.
         Called when the incoming connection has finished passing all of its records.
         """
 
-        pass
\ No newline at end of file
+        df, last_row = self.parent.plinko_scenarios(self.scenarios, self.scenario_ids)
+        self.parent.push_dataframe(self.parent.DataFrame, df)
+        self.parent.push_dataframe(self.parent.LastRow, last_row)
@@ -1,10 +1,135 @@
 import AlteryxPythonSDK as Sdk
+import matplotlib.colors
+import matplotlib.lines
 import matplotlib.pyplot as plt
 import xml.etree.ElementTree as Et
+import numpy as np
 import pandas as pd
 import random
 import seaborn as sns
+from array import array
 from itertools import cycle
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+# Above this many points the swarm is laid out with beeswarm_offsets() instead of seaborn.swarmplot, whose
+# collision checks grow quadratically with the points of each category.
+SEABORN_MAX_POINTS = 5000
+
+# Rows of the fast layout: values closer than 1/SWARM_ROWS of the value range share a row and are spread sideways.
+SWARM_ROWS = 100
+
+# Smallest marker of the fast layout in points, past this the points of crowded rows overlap instead of vanishing.
+MIN_MARKER_POINTS = 1.0
+
+# Categories are laid out across a process pool from this many points.
+POOL_MIN_POINTS = 200000
+
+# Default number of points above which the swarm is drawn as density strips of DENSITY_BINS rows.
+DENSITY_MIN_POINTS = 500000
+DENSITY_BINS = 200
+
+# Values held by each level of a QuantileSketch, and the number of points of the violins drawn from one.
+SKETCH_CAPACITY = 256
+VIOLIN_POINTS = 100
+
+
+def beeswarm_offsets(values, height):
+    """
+    Binned beeswarm layout of one category, vectorised in O(n log n): the sorted values are cut in rows of the given
+    height and the points of each row spread out from the centre line, alternating right and left.
+    Module level so it can be sent to the worker processes.
+    :param values: The values of the category, without NaNs.
+    :param height: Height of a row, in data units.
+    :return: The horizontal offset of every value, in point widths (0, 1, -1, 2, -2... within each row).
+    """
+
+    order = np.argsort(values, kind='stable')
+    if not len(order):
+        return np.zeros(0, dtype=np.int64)
+    rows = np.floor((values[order] - values[order[0]]) / height).astype(np.int64)
+    starts = np.flatnonzero(np.r_[True, rows[1:] != rows[:-1]])
+    rank = np.arange(len(rows)) - np.repeat(starts, np.diff(np.r_[starts, len(rows)]))
+    offsets = np.empty(len(values), dtype=np.int64)
+    offsets[order] = (rank + 1) // 2 * np.where(rank % 2, 1, -1)
+    return offsets
+
+
+class QuantileSketch:
+    """
+    Mergeable streaming quantile sketch with count, min and max (KLL-style compactors): values are added to level 0,
+    and a level holding SKETCH_CAPACITY values is sorted and every other value, from a random start, moves up one level
+    where it weighs twice as much. Memory grows with the logarithm of the count, quantiles are off by about
+    1/SKETCH_CAPACITY of the count per level. The random starts come from a seeded generator, so the same input always
+    gives the same quantiles.
+    """
+
+    def __init__(self, seed=0):
+        self.count = 0
+        self.min = np.inf
+        self.max = -np.inf
+        self.levels = [[]]  # The values of level h weigh 2**h.
+        self.random = random.Random(seed)
+
+    def add(self, value: float):
+        self.count += 1
+        self.min = min(self.min, value)
+        self.max = max(self.max, value)
+        self.levels[0].append(value)
+        if len(self.levels[0]) >= SKETCH_CAPACITY:
+            self.compress()
+
+    def merge(self, other: 'QuantileSketch'):
+        "Adds the values summarised by other to this sketch"
+        self.count += other.count
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+        self.levels += [[] for level in other.levels[len(self.levels):]]
+        for level, other_level in zip(self.levels, other.levels):
+            level.extend(other_level)
+        self.compress()
+
+    def compress(self):
+        for h, level in enumerate(self.levels):
+            if len(level) >= SKETCH_CAPACITY:
+                level.sort()
+                if h + 1 == len(self.levels):
+                    self.levels.append([])
+                # An odd value out stays on this level so the total weight is kept exact.
+                paired = len(level) - len(level) % 2
+                self.levels[h+1].extend(level[self.random.randint(0, 1):paired:2])
+                del level[:paired]
+
+    def weighted(self):
+        "Returns the retained values, sorted, with their weights"
+        values = np.concatenate([np.asarray(level, dtype=float) for level in self.levels])
+        weights = np.concatenate([np.full(len(level), 2.0**h) for h, level in enumerate(self.levels)])
+        order = np.argsort(values, kind='stable')
+        return values[order], weights[order]
+
+    def quantiles(self, qs):
+        values, weights = self.weighted()
+        ranks = np.cumsum(weights) - weights / 2
+        return np.interp(np.asarray(qs) * self.count, ranks, values)
+
+    def box_stats(self) -> dict:
+        "Statistics for Axes.bxp, whiskers at 1.5 IQR clipped to the data like seaborn's boxplot"
+        q1, median, q3 = self.quantiles([0.25, 0.5, 0.75])
+        iqr = q3 - q1
+        return {'med': median, 'q1': q1, 'q3': q3, 'whislo': max(self.min, q1 - 1.5*iqr),
+                'whishi': min(self.max, q3 + 1.5*iqr), 'fliers': []}
+
+    def violin_stats(self) -> dict:
+        "Statistics for Axes.violin, a Gaussian KDE (Scott's bandwidth) of the weighted values from min to max"
+        values, weights = self.weighted()
+        coords = np.linspace(self.min, self.max, VIOLIN_POINTS)
+        mean = np.average(values, weights=weights)
+        std = np.sqrt(np.average((values - mean)**2, weights=weights))
+        bandwidth = std * self.count**-0.2 or (self.max - self.min) / VIOLIN_POINTS or 1.0
+        vals = (weights * np.exp(-0.5*((coords[:, np.newaxis] - values) / bandwidth)**2)).sum(1)
+        return {'coords': coords, 'vals': vals / (vals.sum() or 1), 'mean': mean,
+                'median': self.quantiles(0.5), 'min': self.min, 'max': self.max}
+
 
 class AyxPlugin:
     """
@@ -34,6 +159,8 @@ class AyxPlugin:
         self.plot_violin = False
         self.plot_boxplot = False
         self.key_var = None
+        self.density_threshold = DENSITY_MIN_POINTS
+        self.sample_size = 0
 
     def pi_init(self, str_xml: str):
         """
@@ -126,6 +253,22 @@ class AyxPlugin:
         
         
         
+        # Above this many points the swarm is drawn as density strips, 0 never does.
+        temp_threshold = Et.fromstring(str_xml).find('DensityThreshold').text if 'DensityThreshold' in str_xml else None
+        try:
+            self.density_threshold = int(float(temp_threshold)) if temp_threshold else DENSITY_MIN_POINTS
+        except ValueError:
+            self.alteryx_engine.output_message(self.n_tool_id, Sdk.EngineMessageType.warning,
+                                               self.xmsg('Density threshold is not a number, using ' + str(DENSITY_MIN_POINTS)))
+
+        # Records kept per key for the swarm, 0 keeps them all.
+        temp_sample = Et.fromstring(str_xml).find('SampleSize').text if 'SampleSize' in str_xml else None
+        try:
+            self.sample_size = max(int(float(temp_sample)), 0) if temp_sample else 0
+        except ValueError:
+            self.alteryx_engine.output_message(self.n_tool_id, Sdk.EngineMessageType.warning,
+                                               self.xmsg('Sample size is not a number, keeping every record'))
+
         # Getting the output anchor from the XML file.
         self.output_anchor = self.output_anchor_mgr.get_output_anchor('Output')
 
@@ -238,7 +381,14 @@ class IncomingInterface:
         self.selected_columns = self.parent.field_selection
         self.key_var=self.parent.key_var
         self.color_var= self.parent.color_var
-        self.field_lists = []
+        self.measure_fields = []
+        self.measure_values = []
+        self.key_field = None
+        self.key_values = array('i')
+        self.key_codes = {}
+        self.key_labels = []
+        self.color_field = None
+        self.key_colors = []
         self.in_record_list = []
         self.counter = 0
         self.despine= self.parent.despine #Default 
@@ -246,6 +396,12 @@ class IncomingInterface:
         self.remove_legend = self.parent.remove_legend
         self.plot_violin = self.parent.plot_violin
         self.plot_boxplot = self.parent.plot_boxplot
+        self.density_threshold = self.parent.density_threshold
+        self.sample_size = self.parent.sample_size
+        self.reservoirs = {}
+        self.key_seen = {}
+        self.sketches = []
+        self.random = random.Random(0)  # Same input, same sample.
         if self.plot_violin or self.plot_boxplot:
             self.alpha= 0.3
         else:
@@ -262,9 +418,18 @@ class IncomingInterface:
         # returns a new empty RecordCreator object that is identical to record_info_in.
         record_info_out = record_info_in.clone()
 
-        # Storing the field names to use when creating the dataframe.
-        for field in range(record_info_in.num_fields):
-            self.field_lists.append([record_info_in[field].name])
+        # Only the plotted fields are read: the measurements as doubles, the key and color as text.
+        self.measure_fields = [record_info_in.get_field_by_name(name, False) for name in self.selected_columns]
+        if self.key_var is not None:
+            self.key_field = record_info_in.get_field_by_name(self.key_var, False)
+        if self.color_var != '' and self.key_var is not None:
+            self.color_field = record_info_in.get_field_by_name(self.color_var, False)
+        if None in self.measure_fields or (self.key_var is not None and self.key_field is None) or \
+                (self.color_var != '' and self.key_var is not None and self.color_field is None):
+            self.parent.display_error_msg('The selected fields are missing from the input.')
+            return False
+        self.measure_values = [array('d') for field in self.measure_fields]
+        self.sketches = [{} for field in self.measure_fields]
 
         return True
 
@@ -275,13 +440,58 @@ class IncomingInterface:
         :return: False if method calling limit (record_cnt) is hit.
         """
 
-        # Storing the string data of in_record
-        for field in range(self.record_info_in.num_fields):
-            in_value = self.record_info_in[field].get_as_string(in_record)
-            self.field_lists[field].append(in_value) if in_value is not None else self.field_lists[field].append('')
+        # Storing the plotted data of in_record, nulls as NaN (measurements) or '' (key and color)
+        in_values = [field.get_as_double(in_record) for field in self.measure_fields]
+        code = 0
+        if self.key_field is not None:
+            # Keys are stored as integer codes, the color of a key is the one on the first record with that key.
+            key = self.key_field.get_as_string(in_record) or ''
+            code = self.key_codes.get(key)
+            if code is None:
+                code = self.key_codes[key] = len(self.key_labels)
+                self.key_labels.append(key)
+                if self.color_field is not None:
+                    self.key_colors.append(self.color_field.get_as_string(in_record) or '')
+
+        slot = len(self.measure_values[0])
+        if self.sample_size:
+            # Every record goes into the sketches, only the sampled ones are stored.
+            for in_value, sketches in zip(in_values, self.sketches):
+                if in_value is not None:
+                    sketch = sketches.get(code) or sketches.setdefault(code, QuantileSketch(code))
+                    sketch.add(in_value)
+            slot = self.reservoir_slot(code)
+            if slot is None:
+                return True
+
+        if slot < len(self.measure_values[0]):
+            for in_value, values in zip(in_values, self.measure_values):
+                values[slot] = in_value if in_value is not None else np.nan
+        else:
+            for in_value, values in zip(in_values, self.measure_values):
+                values.append(in_value if in_value is not None else np.nan)
+            if self.key_field is not None:
+                self.key_values.append(code)
 
         return True
 
+    def reservoir_slot(self, code: int):
+        """
+        Reservoir sampling (algorithm R) of the records of one key: the first sample_size records are kept, after that
+        the n-th record replaces a random kept one with probability sample_size/n.
+        :param code: The key code of the record, 0 without a key.
+        :return: The row of the buffers to store the record in, None to drop it.
+        """
+
+        seen = self.key_seen.get(code, 0)
+        self.key_seen[code] = seen + 1
+        slots = self.reservoirs.setdefault(code, array('q'))
+        if seen < self.sample_size:
+            slots.append(len(self.measure_values[0]))
+            return slots[-1]
+        kept = self.random.randrange(seen + 1)
+        return slots[kept] if kept < self.sample_size else None
+
     def ii_update_progress(self, d_percent: float):
         """
         Called by the upstream tool to report what percentage of records have been pushed.
@@ -294,13 +504,21 @@ class IncomingInterface:
         """
         Called when the incoming connection has finished passing all of its records.
         """
-        #Create Dataframe based on the stored values:
-        #debug with open(r'C:\Users\DavidSM\Desktop\tmp\output_field_list.txt', "w") as fieldFile:
-        #debug   fieldFile.write(str(self.field_lists))
-        #create the dataframe, reshape
-        self.input_dataframe = pd.DataFrame.from_records(self.field_lists).T
-        self.input_dataframe.columns = self.input_dataframe.iloc[0]
-        self.input_dataframe = self.input_dataframe[self.input_dataframe.index>0]
+        #Create Dataframe based on the stored values, one column per buffer:
+        columns = {name: np.asarray(values) for name, values in zip(self.selected_columns, self.measure_values)}
+        if self.key_field is not None:
+            columns[self.key_var] = pd.Categorical.from_codes(np.asarray(self.key_values), self.key_labels)
+        self.input_dataframe = pd.DataFrame(columns)
+        if self.sample_size:
+            medians = []
+            for name, sketches in zip(self.selected_columns, self.sketches):
+                total = QuantileSketch(len(self.key_labels))  # Seeded past the key codes of the per-key sketches.
+                for sketch in sketches.values():
+                    total.merge(sketch)
+                medians.append(name + ' ' + (str(round(float(total.quantiles(0.5)), 6)) if total.count else 'null'))
+            self.parent.alteryx_engine.output_message(self.parent.n_tool_id, Sdk.EngineMessageType.info, self.parent.xmsg(
+                'Swarm of {} sampled records out of {}, overlays over all records; medians: {}'.format(
+                    len(self.measure_values[0]), sum(self.key_seen.values()), ', '.join(medians))))
   
 
         #retrieve graph data_frame
@@ -350,8 +568,6 @@ class IncomingInterface:
         keep_columns = selected_columns[:]
         if key_var is not None:
             keep_columns.append(key_var)
-        if color_var != '':
-            keep_columns.append(color_var)
 
 
         df = self.input_dataframe[keep_columns]
@@ -367,24 +583,17 @@ class IncomingInterface:
         #Colors are provided
         if color_var != '':
             if key_var is not None: #Colors cannot be provided without a key_var
-                #Get colors from column for dictionary
-                gc = df.pivot(columns=key_var, values=color_var)
-                
-                for un in gc.columns.unique():
-                    dict_colors[un] = gc[gc[un].notnull()].iloc[0][un]
-
-                #Drop color from df
-                df.drop(color_var, axis=1, inplace=True)
+                #Get colors from the first color seen for each key
+                dict_colors = dict(zip(self.key_labels, self.key_colors))
         #Colors are not provided
             ## If no color is given, then take the default named colors, randomize and cycle --don't think anyone
             ## is going to use more than 148 colors, but...
         else:
             if key_var is not None: #If key_var exists, assign color to unique values in the key_var
-                for un in df[key_var].unique():
+                for un in self.key_labels:
                     dict_colors[un] = next(c_colors)
             else:                   #If key_var doesn't exist, assign color based on measurement
-                temp = pd.melt(df, var_name="measurement")
-                for un in temp["measurement"].unique():
+                for un in selected_columns:
                     dict_colors[un] = next(c_colors)
                 
 
@@ -394,26 +603,31 @@ class IncomingInterface:
         df = pd.melt(df,key_var, var_name="measurement")
 
 
-        
-        df.value = df.value.apply(lambda x: float(x))
-        
+
 
         #debug df.to_csv(r'C:\Users\DavidSM\Desktop\tmp\melted_df.csv')
 
         fig, ax = plt.subplots()
 
-        if key_var is not None:
+        if 0 < self.density_threshold < df.value.count():
+            self.density_swarm(df, selected_columns, key_var, dict_colors, ax)
+        elif df.value.count() > SEABORN_MAX_POINTS:
+            self.fast_swarm(df, selected_columns, key_var, dict_colors, fig, ax)
+        elif key_var is not None:
             sns.swarmplot(x=df["measurement"], y=df.value, hue=df[key_var], palette=dict_colors, ax=ax, alpha=self.alpha)
         else:
             sns.swarmplot(x=df["measurement"], y=df.value, palette=dict_colors, ax=ax, alpha=self.alpha)
         
          #   ViolinPlots? Boxplots?
-        if self.plot_violin:
+        if self.sample_size and (self.plot_violin or self.plot_boxplot):
+            # The swarm is only a sample, the overlay is drawn from the sketches of every record instead.
+            self.sketch_overlay(selected_columns, key_var, dict_colors, ax)
+        elif self.plot_violin:
             if key_var is not None:
                 sns.violinplot(x=df["measurement"], y=df.value, hue=df[key_var], palette=dict_colors, ax=ax)
             else:
                 sns.violinplot(x=df["measurement"], y=df.value, palette=dict_colors, ax=ax)
-        if self.plot_boxplot:
+        elif self.plot_boxplot:
             if key_var is not None:
                 sns.boxplot(x=df["measurement"], y=df.value, hue=df[key_var], palette=dict_colors, ax=ax)
             else:
@@ -444,3 +658,120 @@ class IncomingInterface:
         
         return df
 
+    def fast_swarm(self, df, selected_columns, key_var, dict_colors, fig, ax):
+        """
+        Draws the swarm of large inputs with the binned layout of beeswarm_offsets(), one ax.scatter per measurement,
+        at the same x positions seaborn uses so the overlays line up. Categories are laid out across a process pool
+        when there are POOL_MIN_POINTS points or more, in this process if the pool is not available.
+        """
+
+        df = df[df.value.notna()]
+        categories = [df[df.measurement == name] for name in selected_columns]
+        low, high = df.value.min(), df.value.max()
+        height = (high - low) / SWARM_ROWS if high > low else 1.0
+        groups = [category.value.values for category in categories]
+
+        offsets = None
+        if len(df) >= POOL_MIN_POINTS and len(groups) > 1:
+            try:
+                with ProcessPoolExecutor() as pool:
+                    offsets = list(pool.map(beeswarm_offsets, groups, [height]*len(groups)))
+            except (OSError, BrokenProcessPool):
+                pass
+        if offsets is None:
+            offsets = [beeswarm_offsets(group, height) for group in groups]
+
+        # Point size from the row height on screen, narrowed so the widest row stays within its category (down to
+        # MIN_MARKER_POINTS, the points of very crowded rows overlap after that).
+        box = ax.get_window_extent().transformed(fig.dpi_scale_trans.inverted())
+        row_points = box.height * 72 / SWARM_ROWS
+        step = row_points / (box.width * 72 / max(len(groups), 1))
+        widest = max((np.abs(offset).max() for offset in offsets if len(offset)), default=0)
+        if widest:
+            step = min(step, 0.45 / widest)
+        marker_points = max(min(row_points, step * box.width * 72 / max(len(groups), 1)), MIN_MARKER_POINTS)
+
+        if key_var is not None:
+            palette = matplotlib.colors.to_rgba_array([dict_colors[label] for label in df[key_var].cat.categories])
+        for position, (name, category, offset) in enumerate(zip(selected_columns, categories, offsets)):
+            if key_var is not None:
+                colors = palette[category[key_var].cat.codes.values]
+            else:
+                colors = dict_colors[name]
+            ax.scatter(position + offset*step, category.value.values, s=marker_points**2, c=colors,
+                       alpha=self.alpha, linewidths=0)
+        self.label_axes(df, selected_columns, key_var, dict_colors, ax)
+
+    def density_swarm(self, df, selected_columns, key_var, dict_colors, ax):
+        """
+        Draws very large inputs as density strips: the values of each measurement are binned in DENSITY_BINS rows with
+        NumPy and every row is drawn as wide as its count, split by key in the key's color. The drawing does not grow
+        with the number of points, only the histograms do.
+        """
+
+        df = df[df.value.notna()]
+        low, high = df.value.min(), df.value.max()
+        edges = np.linspace(low, high if high > low else low + 1, DENSITY_BINS + 1)
+        centers = (edges[:-1] + edges[1:]) / 2
+        labels = list(df[key_var].cat.categories) if key_var is not None else []
+        strips = []
+        for name in selected_columns:
+            category = df[df.measurement == name]
+            bins = np.clip(np.searchsorted(edges, category.value.values, side='right') - 1, 0, DENSITY_BINS - 1)
+            if key_var is not None:
+                codes = category[key_var].cat.codes.values.astype(np.int64)
+                strips.append(np.bincount(codes*DENSITY_BINS + bins, minlength=len(labels)*DENSITY_BINS)
+                              .reshape(len(labels), DENSITY_BINS))
+            else:
+                strips.append(np.bincount(bins, minlength=DENSITY_BINS)[np.newaxis])
+        widest = max((counts.sum(0).max() for counts in strips), default=0) or 1
+
+        for position, (name, counts) in enumerate(zip(selected_columns, strips)):
+            # Each strip is centred on its category, 0.9 wide at its fullest row, the keys side by side.
+            bounds = np.vstack([np.zeros(DENSITY_BINS), np.cumsum(counts, axis=0)])
+            bounds = position + 0.9 * (bounds - counts.sum(0) / 2) / widest
+            for k in range(len(counts)):
+                ax.fill_betweenx(centers, bounds[k], bounds[k+1], step='mid', linewidth=0, alpha=self.alpha,
+                                 color=dict_colors[labels[k]] if key_var is not None else dict_colors[name])
+        self.label_axes(df, selected_columns, key_var, dict_colors, ax)
+
+    def sketch_overlay(self, selected_columns, key_var, dict_colors, ax):
+        """
+        Draws the violin or boxplot overlay from the QuantileSketch of every measurement and key, so it describes all
+        the records and not only the sampled swarm. Boxes and violins are placed, and dodged by key, like seaborn's.
+        """
+
+        groups = self.key_labels if key_var is not None else [None]
+        width = 0.8 / max(len(groups), 1)
+        stats, positions, colors = [], [], []
+        for position, (name, sketches) in enumerate(zip(selected_columns, self.sketches)):
+            for code, label in enumerate(groups):
+                if code in sketches:
+                    stats.append(sketches[code].violin_stats() if self.plot_violin else sketches[code].box_stats())
+                    positions.append(position - 0.4 + (code + 0.5) * width)
+                    colors.append(dict_colors[label] if key_var is not None else dict_colors[name])
+        if not stats:
+            return
+        if self.plot_violin:
+            parts = ax.violin(stats, positions, widths=width, showextrema=False, showmedians=True)
+            for body, color in zip(parts['bodies'], colors):
+                body.set_facecolor(color)
+                body.set_edgecolor('0.3')
+                body.set_alpha(0.8)
+        else:
+            parts = ax.bxp(stats, positions, widths=width * 0.8, patch_artist=True, showfliers=False,
+                           manage_ticks=False)
+            for box, color in zip(parts['boxes'], colors):
+                box.set_facecolor(color)
+
+    def label_axes(self, df, selected_columns, key_var, dict_colors, ax):
+        "Puts the measurement names and the key legend on the axes drawn by fast_swarm() or density_swarm()"
+        ax.set_xticks(range(len(selected_columns)))
+        ax.set_xticklabels(selected_columns)
+        ax.set_xlabel('measurement')
+        ax.set_ylabel('value')
+        if key_var is not None:
+            ax.legend(handles=[matplotlib.lines.Line2D([], [], linestyle='', marker='o', color=dict_colors[label],
+                                                       label=label) for label in df[key_var].cat.categories],
+                      title=key_var)
+